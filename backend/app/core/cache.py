@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """线程安全的有界缓存：超过 maxsize 时淘汰最久未使用的条目，条目在 ttl 秒后过期"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        return {"size": size, "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+_MISSING = object()
+
+
+class UserResultCache:
+    """按用户分组的查询结果缓存。
+
+    键中带有用户的代数，invalidate(user_id) 使代数加一，该用户之前的结果不再命中，
+    由 LRU/TTL 自然淘汰。计算前先读取代数，计算期间发生的失效不会留下过期结果。
+    写入提交之后再调用 invalidate。缓存在进程内，多进程部署时其他进程的结果最多滞后 ttl 秒。
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.cache = TTLCache(maxsize, ttl)
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, user_id: int, key: Hashable, compute: Callable[[], Any]) -> Any:
+        full_key = (user_id, self._generations.get(user_id, 0), key)
+        value = self.cache.get(full_key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.cache.set(full_key, value)
+        return value
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        return self.cache.stats()
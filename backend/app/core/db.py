@@ -1,11 +1,162 @@
-from typing import Annotated
+from typing import Annotated, Any, Callable
 import os
+import time
 
 from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .metrics import METRICS_ENABLED, db_pool_wait, sqlite_busy_errors
+from .profiling import current_profiler
+from .timing import REQUEST_TIMING, record_query
 
 DB_PATH = os.getenv("DB_PATH", "app.db")
-engine = create_engine(url=f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
+
+# 每个新连接上执行的 PRAGMA，均可通过环境变量调整
+SQLITE_PRAGMAS = {
+    # WAL 模式下读写互不阻塞，只有写与写之间串行
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    # WAL 模式下 NORMAL 仍能保证数据库一致性，只在断电时可能丢失最近提交的事务
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    # 遇到锁时等待的毫秒数，而不是立即报 database is locked
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    # 负数表示 KiB，默认每个连接 64MB 页缓存
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+# 开启后异步接口通过 aiosqlite 访问数据库，否则在线程池中使用同步会话
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+
+
+class MeteredPoolMixin:
+    """记录从连接池获取连接的等待时间（含新建连接），连接池耗尽时可在 /metrics 中看到"""
+
+    metric_label = ""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - start, self.metric_label)
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    metric_label = "sync"
+
+
+class MeteredAsyncQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    metric_label = "async"
+
+
+def create_db_engine(
+    path: str = DB_PATH,
+    pragmas: dict | None = None,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW
+) -> Engine:
+    """创建 SQLite 引擎；pragmas 为 None 时使用 SQLITE_PRAGMAS，传入空字典则不做任何调整"""
+    if pragmas is None:
+        pragmas = SQLITE_PRAGMAS
+    memory = path in ("", ":memory:")
+
+    if memory:
+        # 内存数据库只存在于单个连接中，所有会话必须共享同一个连接
+        engine = create_engine(
+            url="sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+    else:
+        engine = create_engine(
+            url=f"sqlite:///{path}",
+            connect_args={"check_same_thread": False},
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            poolclass=MeteredQueuePool if METRICS_ENABLED else QueuePool
+        )
+
+    set_pragmas(engine, pragmas)
+    if REQUEST_TIMING:
+        instrument_engine(engine)
+    if METRICS_ENABLED:
+        count_busy_errors(engine, "sync")
+    return engine
+
+
+def create_async_db_engine(path: str = DB_PATH, pragmas: dict | None = None):
+    """创建基于 aiosqlite 的 AsyncEngine，连接参数与 create_db_engine 一致"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    if pragmas is None:
+        pragmas = SQLITE_PRAGMAS
+    if path in ("", ":memory:"):
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    else:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{path}",
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            poolclass=MeteredAsyncQueuePool if METRICS_ENABLED else AsyncAdaptedQueuePool
+        )
+    set_pragmas(engine.sync_engine, pragmas)
+    if REQUEST_TIMING:
+        instrument_engine(engine.sync_engine)
+    if METRICS_ENABLED:
+        count_busy_errors(engine.sync_engine, "async")
+    return engine
+
+
+def set_pragmas(engine: Engine, pragmas: dict):
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def instrument_engine(engine: Engine):
+    """统计每条 SQL 的耗时，计入当前请求的 RequestTiming"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        record_query(statement, time.perf_counter() - conn.info["query_start"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def fail_query(exception_context):
+        # 执行失败时不会触发 after_cursor_execute，丢弃对应的开始时间
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            record_query(exception_context.statement or "", time.perf_counter() - starts.pop())
+
+
+def count_busy_errors(engine: Engine, label: str):
+    """SQLite 在 busy_timeout 内自行重试，超时仍拿不到锁时才报错，这里统计这类失败次数"""
+
+    @event.listens_for(engine, "handle_error")
+    def count_busy(exception_context):
+        message = str(exception_context.original_exception).lower()
+        if "database is locked" in message or "database is busy" in message or "table is locked" in message:
+            sqlite_busy_errors.inc(label)
+
+
+engine = create_db_engine()
+async_engine = create_async_db_engine() if DB_ASYNC else None
 
 
 def get_session():
@@ -13,4 +164,48 @@ def get_session():
         yield session
 
 
+async def get_async_session():
+    """DB_ASYNC 开启时为 AsyncSession，否则为同步 Session（由 run_sync 放入线程池执行）"""
+    if async_engine is None:
+        with Session(engine) as session:
+            yield session
+    else:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+
 SessionDep = Annotated[Session, Depends(get_session)]
+AsyncSessionDep = Annotated[AsyncSession | Session, Depends(get_async_session)]
+
+
+async def run_sync(session: AsyncSession | Session, fn: Callable[[Session], Any]) -> Any:
+    """以同步 Session 为参数执行 fn，不阻塞事件循环
+
+    AsyncSession 上通过 run_sync 在 greenlet 中执行（实际 IO 由 aiosqlite 完成），
+    同步 Session 则放入线程池执行。
+    """
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(fn)
+    if current_profiler.get() is not None:
+        # cProfile 只统计开启它的线程，分析请求时直接在当前线程执行
+        return fn(session)
+    return await run_in_threadpool(fn, session)
+
+
+class AsyncProxy:
+    """把同步服务的方法包装成协程，每次调用都通过 run_sync 执行
+
+    未开启 DB_ASYNC 时每次调用都是一次线程池调度，接口应只调用一次，
+    需要多次查询时在服务中合并为一个方法（如 list_transactions）。
+    读接口的依赖项也是协程，同步会话下只有 check_data_version 读取版本号时再调度一次；
+    开启 DB_ASYNC 后全部查询经 AsyncSession 执行，不占用线程池。
+    """
+
+    def __init__(self, session: AsyncSession | Session, factory: Callable[[Session], Any]):
+        self.session = session
+        self.factory = factory
+
+    def __getattr__(self, name: str):
+        async def call(*args, **kwargs):
+            return await run_sync(self.session, lambda session: getattr(self.factory(session), name)(*args, **kwargs))
+        return call
@@ -0,0 +1,110 @@
+import hmac
+import os
+
+import jwt
+from fastapi import Depends, Header, HTTPException, Request, Response
+
+from .cache import TTLCache
+from .db import AsyncProxy, AsyncSessionDep
+from .security import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE, oauth2_scheme
+from .timing import timed
+from ..crud.user import UserRepo
+from ..crud.data_version import DataVersionRepo
+
+# 运维接口（如采样分析）的口令，未设置时这些接口返回 404
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Prometheus 抓取 /metrics 时使用的 Bearer token，未设置时 /metrics 返回 404
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# 已删除账号的 user id，保留到其 token 全部过期；只记录在处理删除请求的进程中
+deleted_user_ids = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "4096")),
+    ttl=ACCESS_TOKEN_EXPIRE.total_seconds()
+)
+
+# username -> user id，只用于不带 uid 的旧 token；账号删除时在 UserService.delete_account 中失效
+user_id_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "300"))
+)
+
+
+async def get_user_id(session: AsyncSessionDep, token: str = Depends(oauth2_scheme)) -> int:
+    """从token中解析用户ID
+
+    签名校验通过后直接使用 token 中的 uid，不访问数据库，只检查该账号是否已被删除。
+    删除记录只存在于处理删除请求的进程中，多 worker 部署时其他进程在 token 过期前
+    （ACCESS_TOKEN_EXPIRE）仍会接受该账号的 token；账号 id 不会被复用（见 UserRepo.create_user），
+    因此这些 token 无法访问其他用户的数据。
+    不带 uid 的旧 token 按用户名查找，结果缓存 USER_CACHE_TTL 秒。
+    依赖项均为协程，不经过线程池；只有旧 token 查库时通过 run_sync 执行一次查询。
+    """
+    with timed("jwt"):
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.PyJWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+    username = payload.get("sub")
+    if username is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    user_id = payload.get("uid")
+    if user_id is not None:
+        if not isinstance(user_id, int) or deleted_user_ids.get(user_id):
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return user_id
+
+    user_id = user_id_cache.get(username)
+    if user_id is None:
+        with timed("user-lookup"):
+            user = await AsyncProxy(session, UserRepo).find_user_by_username(username)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        user_id = user.id
+        user_id_cache.set(username, user_id)
+    return user_id
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """按弱比较判断 If-None-Match 是否包含 etag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
+
+
+async def check_data_version(
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+    user_id: int = Depends(get_user_id)
+):
+    """用用户数据版本号生成 ETag；与 If-None-Match 一致时直接返回 304，不执行后续查询
+
+    版本号在查询之前读取，查询期间发生的写入只会让下次请求返回 200，不会返回过期数据。
+    与接口的服务共用同一个会话：DB_ASYNC 开启时经 AsyncSession 读取，否则占用一次线程池调度。
+    """
+    version = await AsyncProxy(session, DataVersionRepo).get(user_id)
+    etag = f'W/"{user_id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(etag, request.headers.get("if-none-match")):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    """校验 X-Admin-Token 请求头；未配置 ADMIN_TOKEN 时接口视为不存在"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def require_metrics_token(authorization: str | None = Header(None)):
+    """校验 Authorization: Bearer <METRICS_TOKEN>；未配置 METRICS_TOKEN 时接口视为不存在"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip(), METRICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+# 延迟直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """进程内指标，按 Prometheus 文本格式输出；每次更新只是一次加锁的字典操作"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def samples(self) -> list[tuple[str, tuple, tuple, float]]:
+        """返回 (后缀, 标签名, 标签值, 数值) 列表"""
+        with self._lock:
+            return [("", self.labelnames, labels, value) for labels, value in self._values.items()]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_labels(names, values)} {_number(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # 标签值 -> [各桶计数（非累计）..., +Inf 桶计数, 总和]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        result = []
+        names = self.labelnames + ("le",)
+        for labels, series in items:
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                total += count
+                result.append(("_bucket", names, labels + (_number(bound),), total))
+            result.append(("_count", self.labelnames, labels, total))
+            result.append(("_sum", self.labelnames, labels, series[-1]))
+        return result
+
+
+class CallbackMetric(Metric):
+    """在采集时调用 collect 计算数值，适合连接池占用、缓存命中数等已有统计"""
+
+    def __init__(self, name: str, help: str, type: str, labelnames: tuple[str, ...],
+                 collect: Callable[[], dict[tuple, float]]):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.collect = collect
+
+    def samples(self):
+        return [("", self.labelnames, labels, value) for labels, value in self.collect().items()]
+
+
+REGISTRY: list[Metric] = []
+
+
+def register(metric: Metric) -> Metric:
+    REGISTRY.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_requests = register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+http_request_duration = register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")))
+http_requests_in_progress = register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled"))
+db_pool_wait = register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled database connection",
+    ("engine",), buckets=POOL_WAIT_BUCKETS))
+sqlite_busy_errors = register(Counter(
+    "sqlite_busy_errors_total", "Statements that failed with database is locked/busy after busy_timeout",
+    ("engine",)))
+upload_bytes = register(Counter("upload_bytes_total", "Bytes received by the image upload endpoint"))
+upload_duration = register(Histogram(
+    "upload_duration_seconds", "Time to hash and store an uploaded image", ("result",)))
+
+
+def route_label(scope) -> str:
+    """用路由模板作为标签（如 /api/transactions/{transaction_id}），避免标签随路径参数无限增长"""
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        # 挂载的子应用（如 /uploads）按挂载点统计
+        if scope.get("endpoint") is not None:
+            return scope.get("root_path", "")[len(scope.get("app_root_path", "")):] or "unmatched"
+        return "unmatched"
+    # 被 include_router 引入的路由只记录自身路径，前缀从实际请求路径中补回
+    try:
+        tail = route.path_format.format(**scope.get("path_params", {}))
+    except (AttributeError, KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    return path[:len(path) - len(tail)] + template if path.endswith(tail) else template
+
+
+class MetricsMiddleware:
+    """统计每个路由的请求数、延迟直方图和正在处理的请求数"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.dec()
+            route = route_label(scope)
+            http_request_duration.observe(time.perf_counter() - start, scope["method"], route)
+            http_requests.inc(scope["method"], route, status)
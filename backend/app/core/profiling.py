@@ -0,0 +1,106 @@
+import cProfile
+import io
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+# 开启后 /api/transactions 和统计接口支持 ?profile=1，返回该次调用的 cProfile 报告
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "0").lower() in ("1", "true", "yes")
+PROFILE_REPORT_LINES = 60
+SAMPLING_MAX_SECONDS = 120
+# 采样时栈顶位于这些模块的线程视为空闲（线程池等待任务、事件循环等待 IO）
+IDLE_MODULES = {"threading.py", "selectors.py", "queue.py"}
+
+# 同一时刻只允许一个采样任务和一个 cProfile，避免互相干扰
+_sampling_lock = threading.Lock()
+_cprofile_lock = threading.Lock()
+
+current_profiler: ContextVar[cProfile.Profile | None] = ContextVar("current_profiler", default=None)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float, include_idle: bool = False) -> Counter:
+    """每隔 interval 秒采集一次所有线程的调用栈，持续 seconds 秒，返回折叠栈 -> 样本数
+
+    折叠栈格式为 "线程名;外层函数;...;内层函数"，可直接交给 flamegraph.pl 或 speedscope。
+    只读取 sys._current_frames()，被采样的线程不需要任何改动，开销与线程数和栈深度成正比。
+    """
+    if not _sampling_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        own = threading.get_ident()
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if not include_idle and os.path.basename(frame.f_code.co_filename) in IDLE_MODULES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+        return stacks
+    finally:
+        _sampling_lock.release()
+
+
+def collapsed_stacks(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+async def get_request_profiler(
+    profile: bool = Query(False, description="返回本次调用的 cProfile 报告，需开启 REQUEST_PROFILING")
+) -> cProfile.Profile | None:
+    if profile and REQUEST_PROFILING:
+        return cProfile.Profile()
+    return None
+
+
+@contextmanager
+def profiled(profiler: cProfile.Profile | None):
+    """在 profiler 下执行代码块；profiler 为 None 时不做任何事
+
+    期间 run_sync 会在当前线程直接执行数据库操作，使查询也计入报告。
+    异步模式下查询在 aiosqlite 的线程中执行，报告中只体现为等待，
+    等待期间事件循环上运行的其他请求也会被计入。
+    """
+    if profiler is None:
+        yield
+        return
+    if not _cprofile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    token = current_profiler.set(profiler)
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        current_profiler.reset(token)
+        _cprofile_lock.release()
+
+
+def profile_report(profiler: cProfile.Profile) -> PlainTextResponse:
+    """按累计耗时排序的 pstats 文本报告"""
+    import pstats
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(PROFILE_REPORT_LINES)
+    return PlainTextResponse(stream.getvalue())
@@ -0,0 +1,22 @@
+from typing import Any, Iterable, Mapping
+
+import orjson
+from fastapi import Response
+
+from .timing import timed
+
+
+def rows_to_dicts(columns: tuple, rows: Iterable[tuple]) -> list[dict]:
+    """把按 columns 查询出的行元组转换为字典，键为列名"""
+    keys = tuple(column.key for column in columns)
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def json_response(content: Any, headers: Mapping[str, str] | None = None) -> Response:
+    """用 orjson 一次序列化，跳过 response_model 的校验；调用方负责保证内容与 response_model 一致
+
+    返回 Response 时依赖项设置的响应头（如 ETag）不会自动合并，需要通过 headers 传入。
+    """
+    with timed("serialize"):
+        body = orjson.dumps(content)
+    return Response(content=body, media_type="application/json", headers=headers)
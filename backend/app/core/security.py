@@ -9,6 +9,7 @@ SECRET_KEY = "WJL-1120233061/ZXH-1120233278"
 ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/login")
+ACCESS_TOKEN_EXPIRE = timedelta(minutes=30)
 
 
 def hash_text(text: str) -> str:
@@ -19,7 +20,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return hash_text(plain_password) == hashed_password
 
 
-def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=30)) -> str:
+def create_access_token(data: dict, expires_delta: timedelta = ACCESS_TOKEN_EXPIRE) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode.update({"exp": expire})
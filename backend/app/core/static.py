@@ -0,0 +1,64 @@
+import os
+import stat
+
+import anyio
+from fastapi import HTTPException
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+
+from .storage import content_digest
+from .thumbnails import THUMBNAIL_DIR, THUMBNAIL_FORMATS, get_thumbnail, snap_width
+
+THUMBNAIL_PREFIX = os.path.basename(THUMBNAIL_DIR) + "/"
+# 上传文件名由内容哈希（旧文件为 uuid）决定，同一 URL 的内容不会改变，可长期缓存
+UPLOAD_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# ?w= 请求的缩略图尚未生成时回退到原图，同一 URL 之后会返回缩略图，每次都需重新验证
+THUMBNAIL_FALLBACK_CACHE_CONTROL = "public, no-cache"
+
+
+def strong_etag(name: str) -> str | None:
+    """内容寻址文件以内容哈希作为强 ETag，缩略图再加上宽度和扩展名；旧文件返回 None"""
+    name = name.replace(os.sep, "/")
+    suffix = ""
+    if name.startswith(THUMBNAIL_PREFIX):
+        width, _, name = name[len(THUMBNAIL_PREFIX):].partition("/")
+        suffix = f"-w{width}{os.path.splitext(name)[1]}"
+    digest = content_digest(name)
+    return f'"{digest}{suffix}"' if digest else None
+
+
+class UploadStaticFiles(StaticFiles):
+    """上传文件的静态服务：?w= 返回缓存的缩略图，内容寻址文件使用强 ETag，所有文件可长期缓存"""
+
+    async def get_response(self, path, scope):
+        params = QueryParams(scope["query_string"])
+        if "w" in params and scope["method"] in ("GET", "HEAD"):
+            width, fmt = params["w"], params.get("format")
+            if not width.isdigit() or int(width) == 0:
+                raise HTTPException(status_code=400, detail="w must be a positive integer")
+            if fmt is not None and fmt not in THUMBNAIL_FORMATS:
+                raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(THUMBNAIL_FORMATS)}")
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+            name = os.path.relpath(full_path, self.directory).replace(os.sep, "/") if full_path else ""
+            if stat_result and stat.S_ISREG(stat_result.st_mode) and not name.startswith(THUMBNAIL_PREFIX):
+                thumb = await get_thumbnail(name, snap_width(int(width)), fmt)
+                if thumb:
+                    return self.file_response(thumb, await anyio.to_thread.run_sync(os.stat, thumb), scope)
+            # 无法生成缩略图时回退到原图；原图的 ETag 与缩略图不同，缩略图生成后重新验证即可拿到
+            response = await super().get_response(path, scope)
+            if "cache-control" in response.headers:
+                response.headers["cache-control"] = THUMBNAIL_FALLBACK_CACHE_CONTROL
+            return response
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        etag = strong_etag(os.path.relpath(full_path, self.directory))
+        if etag:
+            response.headers["etag"] = etag
+        response.headers["cache-control"] = UPLOAD_CACHE_CONTROL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,187 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+
+UPLOAD_DIR = "uploads"
+UPLOAD_URL_PREFIX = "/uploads/"
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+# multipart 边界和字段头允许的额外字节数
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# 文件头魔数 -> 扩展名；WebP 需额外检查第 8-12 字节
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"RIFF", ".webp"),
+]
+
+# 内容寻址文件：uploads/ab/cd/<sha256>.<ext>
+CONTENT_NAME_RE = re.compile(r"^([0-9a-f]{2})/([0-9a-f]{2})/(\1\2[0-9a-f]{60})\.[a-z]+$")
+
+
+def upload_path(url: str | None) -> str | None:
+    """将 /uploads/xxx 形式的 URL 转换为本地文件路径，非上传文件返回 None"""
+    if not url or not url.startswith(UPLOAD_URL_PREFIX):
+        return None
+    parts = url[len(UPLOAD_URL_PREFIX):].split("/")
+    if any(part in ("", ".", "..") or "\\" in part for part in parts):
+        return None
+    return os.path.join(UPLOAD_DIR, *parts)
+
+
+def content_name(digest: str, ext: str) -> str:
+    """内容哈希对应的相对文件名，按哈希前两级分目录，避免单个目录文件过多"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def content_digest(name: str) -> str | None:
+    """从相对文件名中取出内容哈希；旧的 YYYYMMDD_uuid 文件返回 None"""
+    match = CONTENT_NAME_RE.match(name.replace(os.sep, "/"))
+    return match.group(3) if match else None
+
+
+def sniff_image(header: bytes) -> str | None:
+    """根据文件头判断图片类型，返回扩展名；不是支持的图片格式时返回 None"""
+    for signature, ext in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            if ext == ".webp" and header[8:12] != b"WEBP":
+                continue
+            return ext
+    return None
+
+
+class UploadWriter:
+    """分块把上传内容写入临时文件，同时校验类型和大小并计算 SHA-256
+
+    write 超过 max_bytes 时立即抛出 413，调用方据此停止读取请求体。阻塞 IO，需在线程池中调用。
+    """
+
+    def __init__(self, max_bytes: int = UPLOAD_MAX_BYTES):
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-")
+        self.file = os.fdopen(fd, "wb")
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.header = b""
+        self.ext = None
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds {self.max_bytes} bytes")
+        if self.ext is None:
+            self.header += chunk[:16 - len(self.header)]
+            if len(self.header) >= 16:
+                self._check_type()
+        self.digest.update(chunk)
+        self.file.write(chunk)
+
+    def _check_type(self):
+        self.ext = sniff_image(self.header)
+        if self.ext is None:
+            raise HTTPException(status_code=400, detail="File must be an image")
+
+    def finish(self) -> str:
+        """按内容哈希存放，返回相对文件名；相同内容只保存一份，目标文件已存在时丢弃临时文件"""
+        self.file.close()
+        if self.ext is None:
+            self._check_type()
+        name = content_name(self.digest.hexdigest(), self.ext)
+        path = os.path.join(UPLOAD_DIR, *name.split("/"))
+        if os.path.exists(path):
+            # 重复内容：复用已有文件，并刷新修改时间，避免被回收未引用文件的任务误删
+            os.remove(self.tmp_path)
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self.tmp_path, path)
+        return name
+
+    def abort(self):
+        self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+async def receive_upload(request: Request, field: str = "file", max_bytes: int = UPLOAD_MAX_BYTES) -> tuple[str, int]:
+    """从请求体流式解析 multipart/form-data，把 field 字段的文件直接写入 UploadWriter
+
+    不经过 Starlette 的表单解析（它会先把整个请求体落盘），没有 Content-Length 的分块上传
+    也会在超过 max_bytes 时立即中止。返回 (相对文件名, 文件字节数)。
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+
+    pending: list[bytes] = []
+    part = {"headers": {}, "field": b"", "value": b"", "active": False}
+    found = False
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"] = part["value"] = b""
+
+    def on_headers_finished():
+        nonlocal found
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["active"] = not found and options.get(b"name") == field.encode() and b"filename" in options
+        found = found or part["active"]
+
+    def on_part_data(data, start, end):
+        if part["active"]:
+            pending.append(data[start:end])
+
+    def on_part_end():
+        part["headers"] = {}
+        part["active"] = False
+
+    parser = MultipartParser(boundary, {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    # 其他表单字段也计入请求体上限，避免借它们绕过限制
+    body_limit = max_bytes + UPLOAD_FORM_OVERHEAD
+    received = 0
+    writer = await run_in_threadpool(UploadWriter, max_bytes)
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise HTTPException(status_code=413, detail=f"File exceeds {max_bytes} bytes")
+            try:
+                parser.write(chunk)
+            except MultipartParseError:
+                raise HTTPException(status_code=400, detail="Malformed multipart body")
+            if pending:
+                data = b"".join(pending)
+                pending.clear()
+                # 写盘在线程池中进行，不阻塞事件循环
+                await run_in_threadpool(writer.write, data)
+        parser.finalize()
+        if not found:
+            raise HTTPException(status_code=400, detail=f"Missing file field '{field}'")
+        return await run_in_threadpool(writer.finish), writer.size
+    except BaseException:
+        writer.abort()
+        raise
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .storage import UPLOAD_DIR
+
+logger = logging.getLogger("app.thumbnails")
+
+# 缩略图宽度只允许固定几档，任意 ?w= 会向上取到最近的一档，避免缓存无限膨胀
+THUMBNAIL_WIDTHS = tuple(sorted(int(w) for w in os.getenv("THUMBNAIL_WIDTHS", "64,128,256,512").split(",")))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_DIR = os.path.join(UPLOAD_DIR, ".thumbs")
+THUMBNAIL_FORMATS = {"webp": ".webp"}
+# 源文件扩展名 -> 缩略图扩展名；GIF 只取第一帧
+THUMBNAIL_EXTENSIONS = {".jpg": ".jpg", ".png": ".png", ".gif": ".png", ".webp": ".webp"}
+PIL_FORMATS = {".jpg": "JPEG", ".png": "PNG", ".webp": "WEBP"}
+
+_executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+_pending: dict[str, Future] = {}
+_pending_lock = threading.Lock()
+
+
+def snap_width(width: int) -> int:
+    for allowed in THUMBNAIL_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return THUMBNAIL_WIDTHS[-1]
+
+
+def thumbnail_path(name: str, width: int, fmt: str | None = None) -> str | None:
+    """缩略图缓存路径：uploads/.thumbs/<宽度>/<原相对路径>.<扩展名>，不支持的源文件返回 None"""
+    stem, ext = os.path.splitext(name)
+    thumb_ext = THUMBNAIL_FORMATS.get(fmt) or THUMBNAIL_EXTENSIONS.get(ext.lower())
+    if thumb_ext is None:
+        return None
+    return os.path.join(THUMBNAIL_DIR, str(width), *f"{stem}{thumb_ext}".split("/"))
+
+
+def render_thumbnail(src: str, dst: str, width: int) -> str | None:
+    """生成等比缩放、宽度不超过 width 的缩略图并原子写入 dst；失败时返回 None（调用方回退到原图）
+
+    阻塞 IO 和 CPU 计算，在缩略图线程池中执行。
+    """
+    if os.path.exists(dst):
+        return dst
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    try:
+        with Image.open(src) as image:
+            image = ImageOps.exif_transpose(image)
+            ext = os.path.splitext(dst)[1]
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            if ext == ".jpg" and image.mode != "RGB":
+                image = image.convert("RGB")
+            image.thumbnail((width, width * 4))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dst), prefix=".thumb-")
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    image.save(out, PIL_FORMATS[ext], quality=80, optimize=True)
+                os.replace(tmp_path, dst)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+    except Exception:
+        logger.exception("Could not render thumbnail for %s", src)
+        return None
+    return dst
+
+
+def submit_thumbnail(name: str, width: int, fmt: str | None = None) -> Future | None:
+    """把缩略图生成任务提交到线程池；同一缩略图的并发请求共用一个任务"""
+    dst = thumbnail_path(name, width, fmt)
+    if dst is None:
+        return None
+    with _pending_lock:
+        future = _pending.get(dst)
+        if future is None:
+            future = _executor.submit(render_thumbnail, os.path.join(UPLOAD_DIR, *name.split("/")), dst, width)
+            _pending[dst] = future
+            future.add_done_callback(lambda _: _pending.pop(dst, None))
+    return future
+
+
+def schedule_thumbnails(name: str):
+    """上传后在后台预先生成各档缩略图"""
+    for width in THUMBNAIL_WIDTHS:
+        submit_thumbnail(name, width)
+
+
+def remove_thumbnails(name: str):
+    """删除某个上传文件的所有缩略图"""
+    for width in THUMBNAIL_WIDTHS:
+        for fmt in (None, *THUMBNAIL_FORMATS):
+            path = thumbnail_path(name, width, fmt)
+            if path is None:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+async def get_thumbnail(name: str, width: int, fmt: str | None = None) -> str | None:
+    """返回缩略图路径，尚未生成时等待线程池生成；无法生成时返回 None"""
+    dst = thumbnail_path(name, width, fmt)
+    if dst is None:
+        return None
+    if os.path.exists(dst):
+        return dst
+    future = submit_thumbnail(name, width, fmt)
+    return await asyncio.wrap_future(future)
@@ -0,0 +1,143 @@
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger("app.timing")
+
+REQUEST_TIMING = os.getenv("REQUEST_TIMING", "1").lower() in ("1", "true", "yes")
+# 超过该耗时（毫秒）的请求连同其 SQL 写入日志，0 表示不记录
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+# 单个请求的查询数超过该值时视为疑似 N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "20"))
+# 每个请求最多保留的 SQL 条数和每条的长度，避免大批量操作占用过多内存
+TIMING_MAX_STATEMENTS = 50
+TIMING_STATEMENT_LENGTH = 500
+
+
+class RequestTiming:
+    """单个请求的耗时统计：各阶段耗时、查询数、SQL 总耗时和最慢的语句"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.slowest: tuple[float, str] | None = None
+        self.statements: list[tuple[float, str]] = []
+        self.statement_counts: Counter[str] = Counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def add_phase(self, name: str, duration: float):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def add_query(self, statement: str, duration: float):
+        self.query_count += 1
+        self.sql_time += duration
+        self.statement_counts[statement] += 1
+        if self.slowest is None or duration > self.slowest[0]:
+            self.slowest = (duration, statement)
+        if len(self.statements) < TIMING_MAX_STATEMENTS:
+            self.statements.append((duration, statement))
+
+    @property
+    def n_plus_one(self) -> bool:
+        return self.query_count > N_PLUS_ONE_THRESHOLD
+
+    def server_timing(self) -> str:
+        """生成 Server-Timing 响应头，耗时单位为毫秒"""
+        metrics = [f"app;dur={self.elapsed() * 1000:.1f}"]
+        metrics.append(f'db;dur={self.sql_time * 1000:.1f};desc="{self.query_count} queries"')
+        if self.slowest is not None:
+            metrics.append(f"db-slowest;dur={self.slowest[0] * 1000:.1f}")
+        for name, duration in self.phases.items():
+            metrics.append(f"{name};dur={duration * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+current_timing: ContextVar[RequestTiming | None] = ContextVar("current_timing", default=None)
+
+
+@contextmanager
+def timed(name: str):
+    """统计代码块耗时，计入当前请求的 name 阶段；不在请求中时不做任何事"""
+    timing = current_timing.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add_phase(name, time.perf_counter() - start)
+
+
+def record_query(statement: str, duration: float):
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add_query(" ".join(statement.split())[:TIMING_STATEMENT_LENGTH], duration)
+
+
+def log_request(method: str, path: str, status: int, timing: RequestTiming):
+    """慢请求记录完整 SQL，疑似 N+1 的请求记录重复次数最多的语句"""
+    elapsed = timing.elapsed() * 1000
+    slow = SLOW_REQUEST_MS > 0 and elapsed >= SLOW_REQUEST_MS
+    if not slow and not timing.n_plus_one:
+        return
+
+    lines = [
+        f"{method} {path} {status} {elapsed:.1f}ms, {timing.query_count} queries, "
+        f"sql {timing.sql_time * 1000:.1f}ms"
+        + "".join(f", {name} {duration * 1000:.1f}ms" for name, duration in timing.phases.items())
+    ]
+    if timing.n_plus_one:
+        line = f"possible N+1: {timing.query_count} queries (> {N_PLUS_ONE_THRESHOLD})"
+        statement, count = timing.statement_counts.most_common(1)[0]
+        if count > 1:
+            line += f", repeated {count}x: {statement}"
+        lines.append(line)
+    if slow:
+        if timing.slowest is not None:
+            lines.append(f"slowest {timing.slowest[0] * 1000:.1f}ms: {timing.slowest[1]}")
+        lines.extend(f"  {duration * 1000:.1f}ms {statement}" for duration, statement in timing.statements)
+        if timing.query_count > len(timing.statements):
+            lines.append(f"  ... {timing.query_count - len(timing.statements)} more")
+    logger.warning("\n".join(lines))
+
+
+class TimingMiddleware:
+    """记录每个请求的耗时和 SQL 统计，通过 Server-Timing 响应头返回，并记录慢请求
+
+    流式响应在发送响应头时计算 Server-Timing，之后执行的查询只计入日志。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timing.reset(token)
+            log_request(scope["method"], scope["path"], status, timing)
@@ -1,8 +1,20 @@
+from sqlalchemy import delete
 from sqlmodel import Session, select
 from ..models.budget import Budget
 from ..schemas.budget import BudgetCreate, BudgetUpdate
 from datetime import datetime
 
+# 同步接口只查询这些列，顺序与 BudgetResponse 字段一致
+LIST_COLUMNS = (
+    Budget.id,
+    Budget.user_id,
+    Budget.amount,
+    Budget.category,
+    Budget.month,
+    Budget.created_at,
+    Budget.updated_at,
+)
+
 class BudgetRepo:
     def __init__(self, session: Session):
         self.session = session
@@ -41,3 +53,7 @@ class BudgetRepo:
         self.session.commit()
         self.session.refresh(db_budget)
         return db_budget
+
+    def delete_all_for_user(self, user_id: int):
+        """单条 DELETE 删除用户的全部预算，不提交"""
+        self.session.execute(delete(Budget).where(Budget.user_id == user_id))
@@ -0,0 +1,98 @@
+from datetime import datetime
+
+from sqlalchemy import delete, event, insert, literal, select as sa_select
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from ..models.budget import Budget
+from ..models.change_log import ChangeLog
+from ..models.ledger import Ledger
+from ..models.transaction import Transaction
+from ..core.db import SessionDep
+
+# 需要记录变更的模型 -> 实体名
+TRACKED_ENTITIES = {Transaction: "transaction", Ledger: "ledger", Budget: "budget"}
+
+
+class ChangeLogRepo:
+    """增量同步用的变更记录，每个实体只保留最近一次变更。写入方法不提交"""
+
+    def __init__(self, session: SessionDep):
+        self.session = session
+
+    def get_changes(self, user_id: int, since: int, limit: int, include_deleted: bool = True) -> list[ChangeLog]:
+        statement = select(ChangeLog).where(ChangeLog.user_id == user_id, ChangeLog.id > since)
+        if not include_deleted:
+            statement = statement.where(ChangeLog.deleted == False)  # noqa: E712
+        return list(self.session.exec(statement.order_by(ChangeLog.id).limit(limit)).all())
+
+    def get_latest_id(self, user_id: int) -> int:
+        statement = select(ChangeLog.id).where(ChangeLog.user_id == user_id).order_by(ChangeLog.id.desc()).limit(1)
+        return self.session.exec(statement).first() or 0
+
+    def get_rows(self, model, columns: tuple, user_id: int, ids: list[int]) -> list:
+        """按 id 查询该用户的记录，返回 columns 行元组"""
+        statement = select(*columns).where(model.user_id == user_id, model.id.in_(ids))
+        return list(self.session.exec(statement).all())
+
+    def record_transactions_after(self, user_id: int, after_id: int):
+        """记录 id 大于 after_id 的该用户交易（用于绕过 ORM 的批量插入）"""
+        self.session.execute(insert(ChangeLog).from_select(
+            ["user_id", "entity", "entity_id", "deleted", "changed_at"],
+            sa_select(
+                Transaction.user_id, literal("transaction"), Transaction.id, literal(False), literal(datetime.now())
+            ).where(Transaction.user_id == user_id, Transaction.id > after_id)
+        ))
+
+    def delete_all_for_user(self, user_id: int):
+        self.session.execute(delete(ChangeLog).where(ChangeLog.user_id == user_id))
+
+    def backfill(self) -> int:
+        """为还没有变更记录的现有交易、账本、预算补写记录并提交，用于首次创建 change_log 表"""
+        now = datetime.now()
+        count = 0
+        for model, entity in TRACKED_ENTITIES.items():
+            logged = select(ChangeLog.entity_id).where(ChangeLog.entity == entity)
+            result = self.session.execute(insert(ChangeLog).from_select(
+                ["user_id", "entity", "entity_id", "deleted", "changed_at"],
+                sa_select(model.user_id, literal(entity), model.id, literal(False), literal(now))
+                .where(model.id.not_in(logged))
+                .order_by(model.id)
+            ))
+            count += result.rowcount
+        self.session.commit()
+        return count
+
+
+def record_changes(connection, changes: list[tuple[int, str, int, bool]]):
+    """写入 (user_id, entity, entity_id, deleted)，并删除这些实体之前的变更记录
+
+    删除时限定 user_id：旧数据库中 id 可能被复用，不能覆盖其他用户的墓碑。
+    """
+    if not changes:
+        return
+    by_entity: dict[tuple[int, str], list[int]] = {}
+    for user_id, entity, entity_id, _ in changes:
+        by_entity.setdefault((user_id, entity), []).append(entity_id)
+    for (user_id, entity), ids in by_entity.items():
+        connection.execute(delete(ChangeLog).where(
+            ChangeLog.user_id == user_id, ChangeLog.entity == entity, ChangeLog.entity_id.in_(ids)
+        ))
+    now = datetime.now()
+    connection.execute(insert(ChangeLog), [
+        {"user_id": user_id, "entity": entity, "entity_id": entity_id, "deleted": deleted, "changed_at": now}
+        for user_id, entity, entity_id, deleted in changes
+    ])
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session: Session, flush_context):
+    """ORM 写入交易、账本、预算时，在同一事务中记录变更；批量 Core 语句需调用方自行记录"""
+    dirty = [obj for obj in session.dirty if session.is_modified(obj)]
+    changes = []
+    for objects, deleted in ((session.new, False), (dirty, False), (session.deleted, True)):
+        for obj in objects:
+            entity = TRACKED_ENTITIES.get(type(obj))
+            if entity is not None:
+                changes.append((obj.user_id, entity, obj.id, deleted))
+    record_changes(session.connection(), changes)
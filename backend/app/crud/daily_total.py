@@ -0,0 +1,140 @@
+from datetime import date
+
+from sqlalchemy import bindparam, delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import select, func
+
+from ..models.daily_total import DailyTotal
+from ..models.transaction import Transaction
+from ..core.db import SessionDep
+
+
+class DailyTotalRepo:
+    """daily_totals 汇总表。增量方法不提交，由调用方与交易写入在同一事务中提交"""
+
+    def __init__(self, session: SessionDep):
+        self.session = session
+
+    def add(self, transaction: Transaction):
+        self._apply(transaction, 1)
+
+    def remove(self, transaction: Transaction):
+        self._apply(transaction, -1)
+
+    def _apply(self, transaction: Transaction, sign: int):
+        key = {
+            "user_id": transaction.user_id,
+            "day": transaction.date.date().isoformat(),
+            "type": transaction.type,
+            "category": transaction.category,
+        }
+        statement = insert(DailyTotal).values(**key, amount=sign * transaction.amount, count=sign)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                "amount": DailyTotal.amount + statement.excluded.amount,
+                "count": DailyTotal.count + statement.excluded.count,
+            }
+        )
+        self.session.execute(statement)
+        if sign < 0:
+            self.session.execute(
+                delete(DailyTotal).where(
+                    *(getattr(DailyTotal, column) == value for column, value in key.items()),
+                    DailyTotal.count <= 0
+                )
+            )
+
+    def add_deltas(self, user_id: int, deltas: dict[tuple[date, str, str], list]):
+        """批量累加 {(day, type, category): [amount, count]}，一次 executemany upsert
+
+        计数减少的分组随后用一次 executemany 删除计数归零的行。
+        """
+        rows = [
+            {"user_id": user_id, "day": day.isoformat(), "type": type, "category": category, "amount": amount, "count": count}
+            for (day, type, category), (amount, count) in deltas.items()
+            if amount or count
+        ]
+        if not rows:
+            return
+        statement = insert(DailyTotal)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "day", "type", "category"],
+            set_={
+                "amount": DailyTotal.amount + statement.excluded.amount,
+                "count": DailyTotal.count + statement.excluded.count,
+            }
+        )
+        self.session.execute(statement, rows)
+
+        removed = [
+            {"b_user_id": row["user_id"], "b_day": row["day"], "b_type": row["type"], "b_category": row["category"]}
+            for row in rows if row["count"] < 0
+        ]
+        if removed:
+            # ORM 会话不支持 executemany 的 DELETE，在 Core 层执行（仍在同一事务中）
+            self.session.connection().execute(
+                delete(DailyTotal).where(
+                    DailyTotal.user_id == bindparam("b_user_id"),
+                    DailyTotal.day == bindparam("b_day"),
+                    DailyTotal.type == bindparam("b_type"),
+                    DailyTotal.category == bindparam("b_category"),
+                    DailyTotal.count <= 0
+                ),
+                removed
+            )
+
+    def delete_all_for_user(self, user_id: int):
+        self.session.execute(delete(DailyTotal).where(DailyTotal.user_id == user_id))
+
+    def rebuild(self, user_id: int | None = None) -> int:
+        """根据原始交易记录重建汇总表，返回写入的行数"""
+        clear = delete(DailyTotal)
+        source = select(
+            Transaction.user_id,
+            func.date(Transaction.date),
+            Transaction.type,
+            Transaction.category,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        )
+        if user_id is not None:
+            clear = clear.where(DailyTotal.user_id == user_id)
+            source = source.where(Transaction.user_id == user_id)
+        source = source.group_by(
+            Transaction.user_id,
+            func.date(Transaction.date),
+            Transaction.type,
+            Transaction.category
+        )
+
+        self.session.execute(clear)
+        result = self.session.execute(
+            insert(DailyTotal).from_select(
+                ["user_id", "day", "type", "category", "amount", "count"],
+                source
+            )
+        )
+        self.session.commit()
+        return result.rowcount
+
+
+class DailyTotalDeltas:
+    """在内存中累计汇总增量，add/remove 与 DailyTotalRepo 相同，最后交给 add_deltas 一次写入
+
+    只用于单个用户的批量写入，键为 (day, type, category)。
+    """
+
+    def __init__(self):
+        self.deltas: dict[tuple[date, str, str], list] = {}
+
+    def add(self, transaction: Transaction):
+        self._apply(transaction, 1)
+
+    def remove(self, transaction: Transaction):
+        self._apply(transaction, -1)
+
+    def _apply(self, transaction: Transaction, sign: int):
+        delta = self.deltas.setdefault((transaction.date.date(), transaction.type, transaction.category), [0.0, 0])
+        delta[0] += sign * transaction.amount
+        delta[1] += sign
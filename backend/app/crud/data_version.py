@@ -0,0 +1,26 @@
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import select
+
+from ..models.data_version import UserDataVersion
+from ..core.db import SessionDep
+
+
+class DataVersionRepo:
+    """用户数据版本号。bump 不提交，由调用方与数据写入在同一事务中提交"""
+
+    def __init__(self, session: SessionDep):
+        self.session = session
+
+    def get(self, user_id: int) -> int:
+        version = self.session.exec(
+            select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)
+        ).first()
+        return version or 0
+
+    def bump(self, user_id: int):
+        statement = insert(UserDataVersion).values(user_id=user_id, version=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={"version": UserDataVersion.version + 1}
+        )
+        self.session.execute(statement)
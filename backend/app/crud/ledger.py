@@ -1,11 +1,21 @@
 from fastapi import HTTPException
-from sqlmodel import select
+from sqlalchemy import delete
+from sqlmodel import select, func
 from datetime import datetime
 from typing import Optional
 
 from ..models.ledger import Ledger
 from ..core.db import SessionDep
 
+# 列表接口只查询这些列，直接返回行元组，顺序与 LedgerResponse 字段一致
+LIST_COLUMNS = (
+    Ledger.id,
+    Ledger.user_id,
+    Ledger.name,
+    Ledger.description,
+    Ledger.created_at,
+    Ledger.updated_at,
+)
 
 class LedgerRepo:
     def __init__(self, session: SessionDep):
@@ -28,16 +38,19 @@ class LedgerRepo:
         self,
         user_id: int,
         skip: int = 0,
-        limit: int = 100
-    ) -> list[Ledger]:
-        statement = select(Ledger).where(
+        limit: int = 100,
+        columns: Optional[tuple] = None
+    ) -> list:
+        """传入 columns 时只查询这些列并返回行元组"""
+        statement = select(*columns) if columns else select(Ledger)
+        statement = statement.where(
             Ledger.user_id == user_id
         ).order_by(Ledger.created_at.desc()).offset(skip).limit(limit)
         return list(self.session.exec(statement).all())
 
     def count_user_ledgers(self, user_id: int) -> int:
-        statement = select(Ledger).where(Ledger.user_id == user_id)
-        return len(list(self.session.exec(statement).all()))
+        statement = select(func.count()).select_from(Ledger).where(Ledger.user_id == user_id)
+        return self.session.exec(statement).one()
 
     def update_ledger(self, ledger: Ledger):
         ledger.updated_at = datetime.now()
@@ -55,8 +68,6 @@ class LedgerRepo:
         return True
 
     def delete_all_for_user(self, user_id: int):
-        items = self.get_user_ledgers(user_id=user_id, skip=0, limit=10_000)
-        for l in items:
-            self.session.delete(l)
-        self.session.commit()
+        """单条 DELETE 删除用户的全部账本，不提交"""
+        self.session.execute(delete(Ledger).where(Ledger.user_id == user_id))
 
@@ -1,3 +1,4 @@
+from sqlalchemy import delete
 from sqlmodel import select
 
 from app.models.profile import UserProfile
@@ -24,3 +25,7 @@ class ProfileRepo:
         self.session.commit()
         self.session.refresh(profile)
         return profile
+
+    def delete_for_user(self, user_id: int):
+        """删除用户资料，不提交"""
+        self.session.execute(delete(UserProfile).where(UserProfile.user_id == user_id))
@@ -1,11 +1,44 @@
 from fastapi import HTTPException
-from sqlmodel import select, func
-from datetime import datetime
-from typing import Optional
+from sqlalchemy import delete
+from sqlmodel import select, func, or_, and_, case
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, Optional
 
 from ..models.transaction import Transaction
+from ..models.daily_total import DailyTotal
 from ..core.db import SessionDep
 
+# SQLAlchemy 在 SQLite 中保存 DateTime 的文本格式
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+# 列表接口只查询这些列，直接返回行元组，顺序与 TransactionResponse 字段一致
+LIST_COLUMNS = (
+    Transaction.id,
+    Transaction.user_id,
+    Transaction.type,
+    Transaction.amount,
+    Transaction.category,
+    Transaction.description,
+    Transaction.image_path,
+    Transaction.date,
+    Transaction.created_at,
+    Transaction.updated_at,
+)
+
+
+EXPORT_COLUMNS = (
+    Transaction.id,
+    Transaction.type,
+    Transaction.amount,
+    Transaction.category,
+    Transaction.description,
+    Transaction.image_path,
+    Transaction.date,
+    Transaction.created_at,
+    Transaction.updated_at,
+)
+
 
 class TransactionRepo:
     def __init__(self, session: SessionDep):
@@ -17,6 +50,55 @@ class TransactionRepo:
         self.session.refresh(transaction)
         return transaction
 
+    def add_transaction(self, transaction: Transaction) -> Transaction:
+        """加入会话并 flush 以获得 id，不提交"""
+        self.session.add(transaction)
+        self.session.flush()
+        return transaction
+
+    def touch_transaction(self, transaction: Transaction) -> Transaction:
+        """记录修改时间，不提交"""
+        transaction.updated_at = datetime.now()
+        self.session.add(transaction)
+        return transaction
+
+    def remove_transaction(self, transaction: Transaction):
+        """删除交易记录，不提交"""
+        self.session.delete(transaction)
+
+    def bulk_insert(self, rows: list[dict]):
+        """批量插入（executemany），不提交，由调用方统一提交
+
+        直接交给驱动执行，跳过 ORM 与 SQLAlchemy 的逐行参数处理；
+        日期按 SQLAlchemy 在 SQLite 中的存储格式预先格式化。
+        按日期排序后插入，使 (user_id, date...) 索引的写入更集中。
+        """
+        if not rows:
+            return
+        columns = ["user_id", "type", "amount", "category", "description", "image_path", "date", "created_at"]
+        statement = (
+            f'INSERT INTO "{Transaction.__tablename__}" ({", ".join(columns)}) '
+            f'VALUES ({", ".join("?" for _ in columns)})'
+        )
+        params = [
+            (
+                row["user_id"],
+                row["type"],
+                row["amount"],
+                row["category"],
+                row.get("description"),
+                row.get("image_path"),
+                row["date"].strftime(SQLITE_DATETIME_FORMAT),
+                row["created_at"].strftime(SQLITE_DATETIME_FORMAT)
+            )
+            for row in rows
+        ]
+        params.sort(key=lambda param: param[6])
+        self.session.connection().exec_driver_sql(statement, params)
+
+    def get_max_id(self) -> int:
+        return self.session.exec(select(func.max(Transaction.id))).one() or 0
+
     def get_transaction_by_id(self, transaction_id: int, user_id: int) -> Transaction | None:
         statement = select(Transaction).where(
             Transaction.id == transaction_id,
@@ -32,9 +114,16 @@ class TransactionRepo:
         type: Optional[str] = None,
         category: Optional[str] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> list[Transaction]:
-        statement = select(Transaction).where(Transaction.user_id == user_id)
+        end_date: Optional[datetime] = None,
+        before: Optional[tuple[datetime, int]] = None,
+        columns: Optional[tuple] = None
+    ) -> list:
+        """before 为上一页最后一条记录的 (date, id)，传入时按游标分页并忽略 skip
+
+        传入 columns 时只查询这些列并返回行元组，不构造 ORM 实例。
+        """
+        statement = select(*columns) if columns else select(Transaction)
+        statement = statement.where(Transaction.user_id == user_id)
         
         if type:
             statement = statement.where(Transaction.type == type)
@@ -44,10 +133,43 @@ class TransactionRepo:
             statement = statement.where(Transaction.date >= start_date)
         if end_date:
             statement = statement.where(Transaction.date <= end_date)
+        if before:
+            before_date, before_id = before
+            statement = statement.where(or_(
+                Transaction.date < before_date,
+                and_(Transaction.date == before_date, Transaction.id < before_id)
+            ))
+            skip = 0
         
-        statement = statement.order_by(Transaction.date.desc()).offset(skip).limit(limit)
+        statement = statement.order_by(Transaction.date.desc(), Transaction.id.desc()).offset(skip).limit(limit)
         return list(self.session.exec(statement).all())
 
+    def iter_user_transactions(
+        self,
+        user_id: int,
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> Iterator[tuple]:
+        """逐批读取交易记录的列元组（不构造 ORM 对象），内存占用与总行数无关"""
+        statement = select(*EXPORT_COLUMNS).where(Transaction.user_id == user_id)
+
+        if type:
+            statement = statement.where(Transaction.type == type)
+        if category:
+            statement = statement.where(Transaction.category == category)
+        if start_date:
+            statement = statement.where(Transaction.date >= start_date)
+        if end_date:
+            statement = statement.where(Transaction.date <= end_date)
+
+        statement = statement.order_by(Transaction.date.desc(), Transaction.id.desc())
+        result = self.session.execute(statement.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield from partition
+
     def count_user_transactions(
         self,
         user_id: int,
@@ -84,40 +206,162 @@ class TransactionRepo:
         self.session.commit()
         return True
 
+    def get_image_paths_for_user(self, user_id: int) -> list[str]:
+        statement = select(Transaction.image_path).where(
+            Transaction.user_id == user_id,
+            Transaction.image_path.is_not(None)
+        ).distinct()
+        return list(self.session.exec(statement).all())
+
     def delete_all_for_user(self, user_id: int):
-        items = self.get_user_transactions(user_id=user_id, skip=0, limit=10_000)
-        for t in items:
-            self.session.delete(t)
-        self.session.commit()
+        """单条 DELETE 删除用户的全部交易记录，不提交"""
+        self.session.execute(delete(Transaction).where(Transaction.user_id == user_id))
 
     def get_user_summary(
         self,
         user_id: int,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        by_category: bool = False,
+        by_month: bool = False
     ) -> dict:
-        income_statement = select(func.sum(Transaction.amount)).where(
-            Transaction.user_id == user_id,
-            Transaction.type == "income"
-        )
-        expense_statement = select(func.sum(Transaction.amount)).where(
-            Transaction.user_id == user_id,
-            Transaction.type == "expense"
-        )
-        
+        """按类型条件聚合收支；按需附带分类、月份明细
+
+        区间内的整天从 daily_totals 汇总表读取，首尾不足一天的部分扫描原始记录。
+        """
+        # SQLite 按字面时间比较，与写入时一致地忽略时区信息
         if start_date:
-            income_statement = income_statement.where(Transaction.date >= start_date)
-            expense_statement = expense_statement.where(Transaction.date >= start_date)
+            start_date = start_date.replace(tzinfo=None)
         if end_date:
-            income_statement = income_statement.where(Transaction.date <= end_date)
-            expense_statement = expense_statement.where(Transaction.date <= end_date)
-        
-        total_income = self.session.exec(income_statement).one() or 0.0
-        total_expense = self.session.exec(expense_statement).one() or 0.0
-        
-        return {
-            "total_income": float(total_income),
-            "total_expense": float(total_expense),
-            "balance": float(total_income - total_expense)
+            end_date = end_date.replace(tzinfo=None)
+
+        # 整天区间 [first_day, end_day)；end_date 为闭区间，多加 1 微秒后取当天零点
+        first_day = None
+        if start_date:
+            first_day = start_date.date()
+            if start_date != datetime.combine(first_day, time.min):
+                first_day += timedelta(days=1)
+        end_day = (end_date + timedelta(microseconds=1)).date() if end_date else None
+
+        rows = []
+        if first_day and end_day and first_day >= end_day:
+            rows += self._summary_rows(user_id, by_category, by_month, [
+                Transaction.date >= start_date,
+                Transaction.date <= end_date
+            ])
+        else:
+            rows += self._daily_total_rows(user_id, by_category, by_month, first_day, end_day)
+            edges = []
+            if start_date and start_date.date() != first_day:
+                edges.append(and_(
+                    Transaction.date >= start_date,
+                    Transaction.date < datetime.combine(first_day, time.min)
+                ))
+            if end_date and end_date != datetime.combine(end_day, time.min) - timedelta(microseconds=1):
+                edges.append(and_(
+                    Transaction.date >= datetime.combine(end_day, time.min),
+                    Transaction.date <= end_date
+                ))
+            if edges:
+                rows += self._summary_rows(user_id, by_category, by_month, [or_(*edges)])
+
+        group_by = [by_category, by_month].count(True)
+        total_income = 0.0
+        total_expense = 0.0
+        categories: dict[str, list[float]] = {}
+        months: dict[str, list[float]] = {}
+        for row in rows:
+            keys = list(row[:group_by])
+            row_income = float(row[-2] or 0.0)
+            row_expense = float(row[-1] or 0.0)
+            total_income += row_income
+            total_expense += row_expense
+            if by_category:
+                totals = categories.setdefault(keys.pop(0), [0.0, 0.0])
+                totals[0] += row_income
+                totals[1] += row_expense
+            if by_month:
+                totals = months.setdefault(keys.pop(0), [0.0, 0.0])
+                totals[0] += row_income
+                totals[1] += row_expense
+
+        summary = {
+            "total_income": total_income,
+            "total_expense": total_expense,
+            "balance": total_income - total_expense
         }
+        if by_category:
+            summary["by_category"] = [
+                {"category": key, "income": inc, "expense": exp}
+                for key, (inc, exp) in sorted(categories.items(), key=lambda item: -(item[1][0] + item[1][1]))
+            ]
+        if by_month:
+            summary["by_month"] = [
+                {"month": key, "income": inc, "expense": exp}
+                for key, (inc, exp) in sorted(months.items())
+            ]
+        return summary
 
+    def _summary_rows(self, user_id: int, by_category: bool, by_month: bool, conditions: list) -> list:
+        income = func.sum(case((Transaction.type == "income", Transaction.amount), else_=0.0))
+        expense = func.sum(case((Transaction.type == "expense", Transaction.amount), else_=0.0))
+        group_by = []
+        if by_category:
+            group_by.append(Transaction.category)
+        if by_month:
+            group_by.append(func.strftime("%Y-%m", Transaction.date))
+
+        statement = select(*group_by, income, expense).where(Transaction.user_id == user_id, *conditions)
+        if group_by:
+            statement = statement.group_by(*group_by)
+        return list(self.session.exec(statement).all())
+
+    def _daily_total_rows(
+        self,
+        user_id: int,
+        by_category: bool,
+        by_month: bool,
+        first_day: Optional[date] = None,
+        end_day: Optional[date] = None
+    ) -> list:
+        income = func.sum(case((DailyTotal.type == "income", DailyTotal.amount), else_=0.0))
+        expense = func.sum(case((DailyTotal.type == "expense", DailyTotal.amount), else_=0.0))
+        group_by = []
+        if by_category:
+            group_by.append(DailyTotal.category)
+        if by_month:
+            group_by.append(func.substr(DailyTotal.day, 1, 7))
+
+        statement = select(*group_by, income, expense).where(DailyTotal.user_id == user_id)
+        if first_day:
+            statement = statement.where(DailyTotal.day >= first_day.isoformat())
+        if end_day:
+            statement = statement.where(DailyTotal.day < end_day.isoformat())
+        if group_by:
+            statement = statement.group_by(*group_by)
+        return list(self.session.exec(statement).all())
+
+    def get_user_analytics(
+        self,
+        user_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        utc_offset_minutes: int = 0
+    ) -> list[tuple[str, str, str, float, int]]:
+        """按 (日期, 类型, 分类) 聚合，日期按 utc_offset_minutes 偏移后分桶"""
+        day = func.date(Transaction.date, f"{utc_offset_minutes:+d} minutes")
+        statement = select(
+            day,
+            Transaction.type,
+            Transaction.category,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        ).where(Transaction.user_id == user_id)
+
+        if start_date:
+            statement = statement.where(Transaction.date >= start_date)
+        if end_date:
+            statement = statement.where(Transaction.date <= end_date)
+
+        statement = statement.group_by(day, Transaction.type, Transaction.category).order_by(day)
+        return list(self.session.exec(statement).all())
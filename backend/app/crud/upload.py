@@ -0,0 +1,29 @@
+from sqlmodel import select, union_all
+
+from app.models.transaction import Transaction
+from app.models.profile import UserProfile
+from app.models.user import Users
+from app.core.db import SessionDep
+
+# SQLite 绑定参数数量有限，IN 查询分批进行
+REF_BATCH_SIZE = 500
+
+
+class UploadRefRepo:
+    """上传文件的引用计数，由 Transaction.image_path、UserProfile.avatar_url 和旧的 Users.avatar_path 决定"""
+
+    def __init__(self, session: SessionDep):
+        self.session = session
+
+    def _ref_columns(self):
+        return (Transaction.image_path, UserProfile.avatar_url, Users.avatar_path)
+
+    def referenced(self, urls: list[str]) -> set[str]:
+        """返回 urls 中仍被引用的部分"""
+        urls = list(dict.fromkeys(urls))
+        found = set()
+        for i in range(0, len(urls), REF_BATCH_SIZE):
+            batch = urls[i:i + REF_BATCH_SIZE]
+            statement = union_all(*(select(column).where(column.in_(batch)) for column in self._ref_columns()))
+            found.update(self.session.execute(statement).scalars())
+        return found
@@ -1,10 +1,22 @@
 from fastapi import HTTPException
+from sqlalchemy import func
 from sqlmodel import select
 
 from app.models.user import Users
+from app.models.data_version import UserDataVersion
 from app.core.db import SessionDep
 
 
+def next_user_id():
+    """删除账号时保留其 user_data_versions 行，id 取两表最大值加一，已删除账号的 id 不会被复用
+
+    get_user_id 直接信任 token 中的 uid，id 复用会让旧 token 访问新账号的数据。
+    """
+    last_user = select(func.coalesce(func.max(Users.id), 0)).scalar_subquery()
+    last_deleted = select(func.coalesce(func.max(UserDataVersion.user_id), 0)).scalar_subquery()
+    return select(func.max(last_user, last_deleted) + 1).scalar_subquery()
+
+
 class UserRepo:
     def __init__(self, session: SessionDep):
         self.session = session
@@ -17,6 +29,9 @@ class UserRepo:
         existing_user = self.find_user_by_username(user.username)
         if existing_user is not None:
             raise HTTPException(status_code=409, detail="Username already exists")
+        if user.id is None:
+            # 在 INSERT 中计算 id，并发注册也不会冲突
+            user.id = next_user_id()
         self.session.add(user)
         self.session.commit()
     
@@ -1,40 +1,50 @@
 from fastapi import FastAPI, APIRouter
-from fastapi.staticfiles import StaticFiles
-from sqlmodel import SQLModel
+import asyncio
 import os
 
-from .routers import user, transaction, ledger, upload, budget
-from .core.db import engine
-from .models import user as user_models
-from .models import transaction as transaction_models
-from .models import ledger as ledger_models
-from .models import budget as budget_models
-from .models import profile as profile_models
+from .routers import user, transaction, ledger, upload, budget, system, sync, metrics
+from .migrate import upgrade
+from .core.storage import UPLOAD_DIR
+from .core.static import UploadStaticFiles
+from .core.timing import REQUEST_TIMING, TimingMiddleware
+from .core.metrics import METRICS_ENABLED, MetricsMiddleware
+from .services.upload import UPLOAD_GC_INTERVAL, run_garbage_collector
 
 app = FastAPI()
 
+# 每个请求的耗时、查询数和 SQL 耗时通过 Server-Timing 响应头返回，慢请求和疑似 N+1 写入日志
+if REQUEST_TIMING:
+    app.add_middleware(TimingMiddleware)
+
+# 按路由统计请求数和延迟，通过 /metrics 以 Prometheus 格式暴露
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
+
 # Mount uploads directory to serve static files
-if not os.path.exists("uploads"):
-    os.makedirs("uploads")
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+if not os.path.exists(UPLOAD_DIR):
+    os.makedirs(UPLOAD_DIR)
+app.mount("/uploads", UploadStaticFiles(directory=UPLOAD_DIR), name="uploads")
 
-# 在应用启动时创建所有表
+# 在应用启动时创建所有表，并为已有数据库补建索引；结构已是最新时只读取一次 user_version
 @app.on_event("startup")
 def on_startup():
-    SQLModel.metadata.create_all(engine)
+    upgrade()
 
-# 创建API路由组，添加 /api 前缀
-api_router = APIRouter(prefix="/api")
+# 配置了 UPLOAD_GC_INTERVAL 时，后台定期回收未引用的上传文件
+@app.on_event("startup")
+async def start_upload_gc():
+    if UPLOAD_GC_INTERVAL > 0:
+        app.state.upload_gc = asyncio.create_task(run_garbage_collector(UPLOAD_GC_INTERVAL))
 
-# 将所有路由添加到API路由组
+# 创建API路由组，添加 /api 前缀，所有路由添加完成后只挂载一次
+api_router = APIRouter(prefix="/api")
 api_router.include_router(user.router)
 api_router.include_router(transaction.router)
 api_router.include_router(ledger.router)
 api_router.include_router(upload.router)
 api_router.include_router(budget.router)
+api_router.include_router(sync.router)
+api_router.include_router(system.router)
 
 app.include_router(api_router)
-api_router.include_router(upload.router)
-
-# 将API路由组添加到应用
-app.include_router(api_router)
@@ -0,0 +1,196 @@
+"""
+数据库结构升级：创建缺失的表，并为已有的 app.db（init_db.py 或旧版 create_all 创建）补建索引、
+为交易、账本、预算表补上 AUTOINCREMENT。
+
+升级完成后把模型结构的指纹写入 PRAGMA user_version，下次启动时指纹一致则跳过检查。
+
+用法:
+    python -m app.migrate                       # 升级表结构和索引（忽略 user_version，总是完整检查）
+    python -m app.migrate --rebuild-daily-totals  # 另外根据交易记录重建 daily_totals 汇总表
+"""
+import logging
+import zlib
+
+from sqlalchemy import MetaData, inspect
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlmodel import Session, SQLModel
+
+from .core.db import engine
+from .crud.daily_total import DailyTotalRepo
+from .crud.change_log import TRACKED_ENTITIES, ChangeLogRepo
+# 导入所有模型，使其注册到 SQLModel.metadata
+from .models import user, transaction, ledger, budget, profile, daily_total, data_version, change_log  # noqa: F401
+
+logger = logging.getLogger("app.migrate")
+
+# 已被新索引取代的旧索引，新索引建成后删除
+OBSOLETE_INDEXES = (
+    # 不约束 category 为空的重复行，由 uq_budgets_user_month_coalesce_category 取代
+    "uq_budgets_user_month_category",
+)
+
+
+def schema_version(bind: Engine = engine) -> int:
+    """由表、列和索引定义计算出的指纹，模型有改动时随之变化；取 31 位以适应 user_version"""
+    parts = []
+    for table in SQLModel.metadata.sorted_tables:
+        # 建表 DDL 包含列定义和 AUTOINCREMENT 等表级参数
+        parts.append(str(CreateTable(table).compile(bind=bind)))
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            # 编译出的 DDL 包含表达式列（如 coalesce(category, '')）、唯一性和 sqlite_where 等方言参数
+            parts.append(str(CreateIndex(index).compile(bind=bind)))
+    return zlib.crc32("\n".join(parts).encode()) & 0x7FFFFFFF
+
+
+def add_missing_columns(bind: Engine) -> list[str]:
+    """为已有的表补上模型中新增的可空列（如 init_db.py 建的表没有 transaction.image_path、users.avatar_path）
+
+    返回补上的列（表名.列名）；不可空的列无法用 ADD COLUMN 补上，只记录警告。
+    """
+    inspector = inspect(bind)
+    added = []
+    with bind.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    logger.warning("Cannot add NOT NULL column %s.%s to an existing table", table.name, column.name)
+                    continue
+                ddl = CreateColumn(column).compile(bind=bind)
+                connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}')
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def has_autoincrement(bind: Engine, table_name: str) -> bool:
+    with bind.connect() as connection:
+        sql = connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+        ).scalar()
+    return sql is None or "AUTOINCREMENT" in sql.upper()
+
+
+def rebuild_with_autoincrement(bind: Engine, table) -> None:
+    """SQLite 不能给已有的表加上 AUTOINCREMENT，按模型建新表、复制数据后替换旧表
+
+    旧表的索引随之删除，由 upgrade 随后重新创建。自增序列从现有最大 id 和该实体的变更记录
+    （含墓碑）中的最大 id 之后开始，已被删除并同步给客户端的 id 不会再次出现。
+    """
+    # 外键引用的表（users）也要放入新的 MetaData，建表 DDL 才能解析外键
+    metadata = MetaData()
+    for referred in {foreign_key.column.table for foreign_key in table.foreign_keys}:
+        referred.to_metadata(metadata)
+    new_table = table.to_metadata(metadata, name=f"{table.name}__new")
+    entity = {model.__table__.name: entity for model, entity in TRACKED_ENTITIES.items()}.get(table.name)
+
+    with bind.begin() as connection:
+        existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+        columns = ", ".join(f'"{column.name}"' for column in table.columns if column.name in existing)
+        connection.execute(CreateTable(new_table))
+        connection.exec_driver_sql(f'INSERT INTO "{new_table.name}" ({columns}) SELECT {columns} FROM "{table.name}"')
+        connection.exec_driver_sql(f'DROP TABLE "{table.name}"')
+        connection.exec_driver_sql(f'ALTER TABLE "{new_table.name}" RENAME TO "{table.name}"')
+
+        last_id = connection.exec_driver_sql(f'SELECT coalesce(max(id), 0) FROM "{table.name}"').scalar()
+        if entity is not None:
+            last_logged = connection.exec_driver_sql(
+                "SELECT coalesce(max(entity_id), 0) FROM change_log WHERE entity = ?", (entity,)
+            ).scalar()
+            last_id = max(last_id, last_logged)
+        connection.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = ?", (table.name,))
+        connection.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table.name, last_id))
+    logger.info("Rebuilt table %s with AUTOINCREMENT", table.name)
+
+
+def get_user_version(bind: Engine) -> int:
+    with bind.connect() as connection:
+        return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def upgrade(bind: Engine = engine, force: bool = False) -> list[str]:
+    """创建缺失的表和索引，返回本次新建的索引名
+
+    数据库的 user_version 与当前模型指纹一致时直接返回，不做 create_all 和逐表检查；force 时总是检查。
+    """
+    version = schema_version(bind)
+    if not force and get_user_version(bind) == version:
+        return []
+
+    had_daily_totals = inspect(bind).has_table("daily_totals")
+    had_change_log = inspect(bind).has_table("change_log")
+    # create_all 只会为新建的表创建索引，已存在的表需要逐个检查
+    SQLModel.metadata.create_all(bind)
+    if not had_daily_totals:
+        # 首次创建汇总表时，用已有交易记录填充
+        rebuild_daily_totals(bind)
+    if not had_change_log:
+        # 首次创建变更记录表时，为已有数据补写记录，首次同步才能拿到全部数据
+        with Session(bind) as session:
+            ChangeLogRepo(session).backfill()
+
+    # create_all 不会修改已存在的表，旧表缺少的列需要单独补上，否则新列上的索引无法创建
+    add_missing_columns(bind)
+
+    # 旧数据库中的表没有 AUTOINCREMENT 时重建，避免删除的 id 被其他用户的新记录复用
+    for table in SQLModel.metadata.sorted_tables:
+        if table.dialect_options["sqlite"]["autoincrement"] and not has_autoincrement(bind, table.name):
+            rebuild_with_autoincrement(bind, table)
+
+    # inspector.get_indexes 不返回表达式索引，直接读取 sqlite_master
+    with bind.connect() as connection:
+        existing = set(connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+    created = []
+    skipped = False
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(bind=bind)
+            except IntegrityError:
+                # 旧数据违反唯一约束时跳过，避免阻塞启动
+                logger.warning("Skipping index %s: existing rows violate its unique constraint", index.name)
+                skipped = True
+                continue
+            except OperationalError:
+                # 表中缺少索引的列（不可空、无法自动补上），同样跳过
+                logger.exception("Skipping index %s", index.name)
+                skipped = True
+                continue
+            created.append(index.name)
+
+    # 有索引未能创建时保留旧索引，避免失去原有约束
+    if not skipped:
+        with bind.begin() as connection:
+            for name in OBSOLETE_INDEXES:
+                connection.exec_driver_sql(f'DROP INDEX IF EXISTS "{name}"')
+
+    # 有索引未能创建时不记录版本，下次启动继续尝试
+    if not skipped:
+        with bind.begin() as connection:
+            connection.exec_driver_sql(f"PRAGMA user_version = {version}")
+    return created
+
+
+def rebuild_daily_totals(bind: Engine = engine) -> int:
+    with Session(bind) as session:
+        return DailyTotalRepo(session).rebuild()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Upgrade the ledger database schema")
+    parser.add_argument("--rebuild-daily-totals", action="store_true", help="rebuild daily_totals from transactions")
+    args = parser.parse_args()
+
+    names = upgrade(force=True)
+    print(f"Created indexes: {', '.join(names)}" if names else "Schema is up to date")
+    if args.rebuild_daily_totals:
+        print(f"Rebuilt daily_totals: {rebuild_daily_totals()} rows")
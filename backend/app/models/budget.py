@@ -1,9 +1,16 @@
 from datetime import datetime
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel
 from typing import Optional
 
 class Budget(SQLModel, table=True):
     __tablename__ = "budgets"
+    __table_args__ = (
+        # SQLite 唯一索引中 NULL 互不相等，用 coalesce 使每月只能有一条总预算（category 为空）
+        Index("uq_budgets_user_month_coalesce_category", "user_id", "month", text("coalesce(category, '')"), unique=True),
+        # AUTOINCREMENT 保证删除最大 id 的记录后 id 不会被复用，增量同步的墓碑按 id 标识记录
+        {"sqlite_autoincrement": True},
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id")
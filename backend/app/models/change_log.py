@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class ChangeLog(SQLModel, table=True):
+    """每条记录（交易、账本、预算）最近一次变更，id 单调递增，作为增量同步的 token"""
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_user_id", "user_id", "id"),
+        Index("ix_change_log_entity", "entity", "entity_id"),
+        # AUTOINCREMENT 保证删除最大 id 的记录后 id 不会被复用
+        {"sqlite_autoincrement": True},
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int
+    entity: str  # "transaction"、"ledger" 或 "budget"
+    entity_id: int
+    deleted: bool = False  # 删除记录的墓碑
+    changed_at: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,13 @@
+from sqlmodel import Field, SQLModel
+
+
+class DailyTotal(SQLModel, table=True):
+    """按 (用户, 日期, 类型, 分类) 汇总的交易金额，随交易写入增量维护"""
+    __tablename__ = "daily_totals"
+
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    day: str = Field(primary_key=True)  # Format: "YYYY-MM-DD"，与 date(transaction.date) 一致
+    type: str = Field(primary_key=True)
+    category: str = Field(primary_key=True)
+    amount: float = 0.0
+    count: int = 0
@@ -0,0 +1,9 @@
+from sqlmodel import Field, SQLModel
+
+
+class UserDataVersion(SQLModel, table=True):
+    """用户数据版本号，交易、账本、预算写入时递增，用于生成 ETag"""
+    __tablename__ = "user_data_versions"
+
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    version: int = 0
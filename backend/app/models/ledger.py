@@ -1,8 +1,15 @@
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class Ledger(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_ledger_user_created_at", "user_id", "created_at"),
+        # AUTOINCREMENT 保证删除最大 id 的记录后 id 不会被复用，增量同步的墓碑按 id 标识记录
+        {"sqlite_autoincrement": True},
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id")
     name: str = Field(max_length=100, description="账本名称")
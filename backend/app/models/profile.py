@@ -1,7 +1,13 @@
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class UserProfile(SQLModel, table=True):
+    __table_args__ = (
+        # 上传文件引用计数
+        Index("ix_userprofile_avatar_url", "avatar_url"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     user_id: int = Field(unique=True)
     avatar_url: str | None = None
@@ -1,9 +1,23 @@
 from datetime import datetime
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional
 
 
 class Transaction(SQLModel, table=True):
+    __table_args__ = (
+        # 列表、游标分页、按日期区间统计
+        Index("ix_transaction_user_date", "user_id", "date"),
+        # 按类型筛选及收支汇总（包含 amount，汇总查询无需回表）
+        Index("ix_transaction_user_type_date", "user_id", "type", "date", "amount"),
+        # 按分类筛选
+        Index("ix_transaction_user_category_date", "user_id", "category", "date"),
+        # 上传文件引用计数（大部分记录没有图片，只索引非空值）
+        Index("ix_transaction_image_path", "image_path", sqlite_where=text("image_path IS NOT NULL")),
+        # AUTOINCREMENT 保证删除最大 id 的记录后 id 不会被复用，增量同步的墓碑按 id 标识记录
+        {"sqlite_autoincrement": True},
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id")
     type: str  # "income" 或 "expense"
@@ -1,7 +1,13 @@
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel
 
 
 class Users(SQLModel, table=True):
+    __table_args__ = (
+        # 上传文件引用计数（旧版头像字段，大部分用户为空，只索引非空值）
+        Index("ix_users_avatar_path", "avatar_path", sqlite_where=text("avatar_path IS NOT NULL")),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     username: str = Field(unique=True)
     password: str
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 
 from ..schemas.ledger import (
     LedgerCreate,
@@ -6,21 +6,14 @@ from ..schemas.ledger import (
     LedgerResponse,
     LedgerListResponse
 )
-from ..services.ledger import LedgerService, get_ledger_service
-from ..core.security import get_current_user
-from ..crud.user import UserRepo
+from ..services.ledger import LedgerService, get_ledger_service, get_async_ledger_service
+from ..core.deps import get_user_id, check_data_version
+from ..core.responses import json_response, rows_to_dicts
+from ..crud.ledger import LIST_COLUMNS
 
 router = APIRouter(prefix="/ledgers", tags=["ledgers"])
 
 
-def get_user_id(current_username: str = Depends(get_current_user), repo: UserRepo = Depends(UserRepo)) -> int:
-    """从token中获取用户名，然后获取用户ID"""
-    user = repo.find_user_by_username(current_username)
-    if user is None:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user.id
-
-
 @router.post("", response_model=LedgerResponse, status_code=201)
 def create_ledger(
     ledger: LedgerCreate,
@@ -35,24 +28,19 @@ def create_ledger(
     )
 
 
-@router.get("", response_model=LedgerListResponse)
-def get_ledgers(
+@router.get("", response_model=LedgerListResponse, dependencies=[Depends(check_data_version)])
+async def get_ledgers(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     user_id: int = Depends(get_user_id),
-    service: LedgerService = Depends(get_ledger_service)
+    service: LedgerService = Depends(get_async_ledger_service)
 ):
     """获取用户的账本列表"""
-    ledgers = service.get_ledgers(
-        user_id=user_id,
-        skip=skip,
-        limit=limit
-    )
-    total = service.repo.count_user_ledgers(user_id)
-    return LedgerListResponse(
-        total=total,
-        items=[LedgerResponse.model_validate(l) for l in ledgers]
-    )
+    # 列表和计数合并为一次调用，同步会话下只进入线程池一次
+    rows, total = await service.list_ledgers(user_id=user_id, skip=skip, limit=limit)
+    # 行元组直接序列化为 JSON，不逐条构造 LedgerResponse
+    return json_response({"total": total, "items": rows_to_dicts(LIST_COLUMNS, rows)}, headers=response.headers)
 
 
 @router.get("/{ledger_id}", response_model=LedgerResponse)
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, Response
+
+from ..core.db import engine, async_engine
+from ..core.deps import require_metrics_token, user_id_cache
+from ..core.metrics import CallbackMetric, register, render_metrics
+from ..services.transaction import summary_cache
+from ..services.budget import budget_cache
+
+# 不在 /api 前缀下，nginx 不代理；但后端端口在 docker-compose 中对外发布，
+# 因此要求 METRICS_TOKEN，未设置时接口返回 404
+router = APIRouter(tags=["metrics"], dependencies=[Depends(require_metrics_token)])
+
+CACHES = {
+    "summary": summary_cache,
+    "budget": budget_cache,
+    "user_id": user_id_cache,
+}
+ENGINES = {"sync": engine, "async": async_engine.sync_engine if async_engine is not None else None}
+
+
+def cache_stat(key: str):
+    return lambda: {(name,): cache.stats()[key] for name, cache in CACHES.items()}
+
+
+def cache_hit_ratio():
+    ratios = {}
+    for name, cache in CACHES.items():
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        ratios[(name,)] = stats["hits"] / lookups if lookups else 0.0
+    return ratios
+
+
+def pool_stat(method: str):
+    return lambda: {
+        (name,): getattr(bind.pool, method)()
+        for name, bind in ENGINES.items()
+        if bind is not None and hasattr(bind.pool, method)
+    }
+
+
+register(CallbackMetric("cache_hits_total", "In-process cache hits", "counter", ("cache",), cache_stat("hits")))
+register(CallbackMetric("cache_misses_total", "In-process cache misses", "counter", ("cache",), cache_stat("misses")))
+register(CallbackMetric("cache_entries", "Entries currently held by the cache", "gauge", ("cache",), cache_stat("size")))
+register(CallbackMetric("cache_hit_ratio", "Cache hits / lookups since process start", "gauge", ("cache",), cache_hit_ratio))
+register(CallbackMetric("db_pool_checked_out", "Connections currently checked out of the pool", "gauge",
+                        ("engine",), pool_stat("checkedout")))
+register(CallbackMetric("db_pool_idle", "Idle connections kept in the pool", "gauge",
+                        ("engine",), pool_stat("checkedin")))
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus 文本格式的进程内指标；多 worker 部署时每个进程各自计数"""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
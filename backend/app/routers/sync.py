@@ -0,0 +1,21 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from ..schemas.sync import SyncResponse
+from ..services.sync import SyncService, get_async_sync_service
+from ..core.deps import get_user_id
+from ..core.responses import json_response
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("", response_model=SyncResponse)
+async def sync(
+    since: Optional[str] = Query(None, description="上次同步返回的 next_token，为空时返回全部记录"),
+    limit: int = Query(500, ge=1, le=1000, description="最多返回的变更数"),
+    user_id: int = Depends(get_user_id),
+    service: SyncService = Depends(get_async_sync_service)
+):
+    """增量同步：返回 since 之后新增、修改的交易、账本、预算，以及已删除记录的 id"""
+    return json_response(await service.get_changes(user_id, since, limit))
@@ -0,0 +1,37 @@
+import os
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from ..core.deps import require_admin, user_id_cache
+from ..core.profiling import SAMPLING_MAX_SECONDS, collapsed_stacks, sample_stacks
+from ..services.transaction import summary_cache
+from ..services.budget import budget_cache
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get("/cache", response_model=dict, dependencies=[Depends(require_admin)])
+def get_cache_stats():
+    """进程内缓存的大小和命中/未命中次数"""
+    return {
+        "summary": summary_cache.stats(),
+        "budget": budget_cache.stats(),
+        "user_id": user_id_cache.stats()
+    }
+
+
+@router.post("/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def sample_profile(
+    seconds: float = Query(10, gt=0, le=SAMPLING_MAX_SECONDS, description="采样时长（秒）"),
+    interval: float = Query(0.01, ge=0.001, le=1, description="采样间隔（秒）"),
+    include_idle: bool = Query(False, description="是否包含空闲线程（等待任务、等待 IO）的样本")
+):
+    """对处理本请求的 worker 进程做采样分析，返回折叠栈，可直接生成火焰图"""
+    stacks = await run_in_threadpool(sample_stacks, seconds, interval, include_idle)
+    pid = os.getpid()
+    return PlainTextResponse(
+        collapsed_stacks(stacks),
+        headers={"Content-Disposition": f'attachment; filename="profile-{pid}.folded"', "X-Worker-Pid": str(pid)}
+    )
@@ -1,8 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from datetime import datetime
-from typing import Optional
-
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, Depends, Query, UploadFile, File, Response
+from fastapi.responses import StreamingResponse
+from cProfile import Profile
 from datetime import datetime
 from typing import Optional
 
@@ -11,23 +9,26 @@ from ..schemas.transaction import (
     TransactionUpdate,
     TransactionResponse,
     TransactionListResponse,
-    TransactionSummaryResponse
+    TransactionSummaryResponse,
+    TransactionAnalyticsResponse,
+    TransactionImportResponse,
+    TransactionBatchRequest,
+    TransactionBatchResponse
 )
-from ..services.transaction import TransactionService, get_transaction_service
-from ..core.security import get_current_user
-from ..crud.user import UserRepo
+from ..services.transaction import (
+    TransactionService,
+    get_transaction_service,
+    get_async_transaction_service,
+    EXPORT_MEDIA_TYPES
+)
+from ..core.deps import get_user_id, check_data_version
+from ..core.responses import json_response, rows_to_dicts
+from ..core.profiling import get_request_profiler, profiled, profile_report
+from ..crud.transaction import LIST_COLUMNS
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
 
-def get_user_id(current_username: str = Depends(get_current_user), repo: UserRepo = Depends(UserRepo)) -> int:
-    """从token中获取用户名，然后获取用户ID"""
-    user = repo.find_user_by_username(current_username)
-    if user is None:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user.id
-
-
 @router.post("", response_model=TransactionResponse, status_code=201)
 def create_transaction(
     transaction: TransactionCreate,
@@ -46,10 +47,30 @@ def create_transaction(
     )
 
 
-@router.get("", response_model=TransactionListResponse)
-def get_transactions(
-    skip: int = Query(0, ge=0, description="跳过的记录数"),
-    limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
+@router.post("/import", response_model=TransactionImportResponse)
+def import_transactions(
+    file: UploadFile = File(..., description="CSV（带表头）或 NDJSON 文件"),
+    format: Optional[str] = Query(None, description="文件格式: 'csv' 或 'ndjson'，默认按扩展名判断"),
+    user_id: int = Depends(get_user_id),
+    service: TransactionService = Depends(get_transaction_service)
+):
+    """批量导入交易记录"""
+    return service.import_transactions(user_id, file.file, file.filename or "", format)
+
+
+@router.post("/batch", response_model=TransactionBatchResponse)
+def batch_transactions(
+    batch: TransactionBatchRequest,
+    user_id: int = Depends(get_user_id),
+    service: TransactionService = Depends(get_transaction_service)
+):
+    """批量创建、更新、删除交易记录，全部成功或全部回滚"""
+    return service.apply_batch(user_id, batch.operations)
+
+
+@router.get("/export")
+def export_transactions(
+    format: str = Query("csv", description="导出格式: 'csv' 或 'ndjson'"),
     type: Optional[str] = Query(None, description="交易类型: 'income' 或 'expense'"),
     category: Optional[str] = Query(None, description="分类筛选"),
     start_date: Optional[datetime] = Query(None, description="开始日期"),
@@ -57,29 +78,74 @@ def get_transactions(
     user_id: int = Depends(get_user_id),
     service: TransactionService = Depends(get_transaction_service)
 ):
-    """获取交易记录列表"""
-    transactions = service.get_transactions(
+    """流式导出交易记录"""
+    chunks = service.export_transactions(
         user_id=user_id,
-        skip=skip,
-        limit=limit,
+        format=format,
         type=type,
         category=category,
         start_date=start_date,
         end_date=end_date
     )
-    total = service.repo.count_user_transactions(
-        user_id=user_id,
-        type=type,
-        category=category,
-        start_date=start_date,
-        end_date=end_date
-    )
-    return TransactionListResponse(
-        total=total,
-        items=[TransactionResponse.model_validate(t) for t in transactions]
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'}
     )
 
 
+@router.get("", response_model=TransactionListResponse, dependencies=[Depends(check_data_version)])
+async def get_transactions(
+    response: Response,
+    skip: int = Query(0, ge=0, description="跳过的记录数，使用 cursor 时忽略"),
+    limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    include_total: bool = Query(True, description="是否返回符合条件的总记录数"),
+    type: Optional[str] = Query(None, description="交易类型: 'income' 或 'expense'"),
+    category: Optional[str] = Query(None, description="分类筛选"),
+    start_date: Optional[datetime] = Query(None, description="开始日期"),
+    end_date: Optional[datetime] = Query(None, description="结束日期"),
+    user_id: int = Depends(get_user_id),
+    service: TransactionService = Depends(get_async_transaction_service),
+    profiler: Optional[Profile] = Depends(get_request_profiler)
+):
+    """获取交易记录列表"""
+    with profiled(profiler):
+        # 分页和计数合并为一次调用，同步会话下只进入线程池一次
+        rows, next_cursor, total = await service.list_transactions(
+            user_id=user_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total,
+            type=type,
+            category=category,
+            start_date=start_date,
+            end_date=end_date
+        )
+        # 行元组直接序列化为 JSON，不逐条构造 TransactionResponse
+        result = json_response(
+            {"total": total, "items": rows_to_dicts(LIST_COLUMNS, rows), "next_cursor": next_cursor},
+            headers=response.headers
+        )
+    if profiler is not None:
+        return profile_report(profiler)
+    return result
+
+
+@router.get("/analytics", response_model=TransactionAnalyticsResponse, dependencies=[Depends(check_data_version)])
+async def get_analytics(
+    start_date: Optional[datetime] = Query(None, description="开始日期"),
+    end_date: Optional[datetime] = Query(None, description="结束日期"),
+    tz: str = Query("UTC", description="按日分桶使用的时区，如 'Asia/Shanghai'"),
+    user_id: int = Depends(get_user_id),
+    service: TransactionService = Depends(get_async_transaction_service)
+):
+    """获取按日、按分类聚合的收支统计"""
+    analytics = await service.get_analytics(user_id, start_date, end_date, tz)
+    return TransactionAnalyticsResponse(**analytics)
+
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 def get_transaction(
     transaction_id: int,
@@ -120,14 +186,20 @@ def delete_transaction(
     return None
 
 
-@router.get("/summary/statistics", response_model=TransactionSummaryResponse)
-def get_summary(
+@router.get("/summary/statistics", response_model=TransactionSummaryResponse, dependencies=[Depends(check_data_version)])
+async def get_summary(
     start_date: Optional[datetime] = Query(None, description="开始日期"),
     end_date: Optional[datetime] = Query(None, description="结束日期"),
+    by_category: bool = Query(False, description="是否附带按分类的收支明细"),
+    by_month: bool = Query(False, description="是否附带按月份的收支明细"),
     user_id: int = Depends(get_user_id),
-    service: TransactionService = Depends(get_transaction_service)
+    service: TransactionService = Depends(get_async_transaction_service),
+    profiler: Optional[Profile] = Depends(get_request_profiler)
 ):
     """获取交易统计摘要（总收入、总支出、余额）"""
-    summary = service.get_summary(user_id, start_date, end_date)
+    with profiled(profiler):
+        summary = await service.get_summary(user_id, start_date, end_date, by_category, by_month)
+    if profiler is not None:
+        return profile_report(profiler)
     return TransactionSummaryResponse(**summary)
 
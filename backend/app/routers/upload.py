@@ -1,47 +1,57 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import shutil
-import os
-import uuid
-from datetime import datetime
+import time
+
+from fastapi import APIRouter, HTTPException, Request
+
+from ..core.metrics import upload_bytes, upload_duration
+from ..core.storage import UPLOAD_FORM_OVERHEAD, UPLOAD_MAX_BYTES, receive_upload
+from ..core.thumbnails import schedule_thumbnails
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
-UPLOAD_DIR = "uploads"
 
-# Ensure upload directory exists
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
+# 请求体由 receive_upload 自行流式解析，这里只为文档声明表单结构
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
 
-@router.post("/image", response_model=dict)
-async def upload_image(file: UploadFile = File(...)):
+@router.post("/image", response_model=dict, openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_image(request: Request):
     """
-    上传图片文件
-    返回: {"url": "/uploads/filename.ext"}
+    上传图片文件（表单字段 file），相同内容只保存一份
+    返回: {"url": "/uploads/ab/cd/<sha256>.ext"}
     """
-    # Validate file type
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image")
-    
-    # Generate unique filename
-    file_ext = os.path.splitext(file.filename)[1]
-    if not file_ext:
-        # Default extension if missing
-        if file.content_type == "image/jpeg":
-            file_ext = ".jpg"
-        elif file.content_type == "image/png":
-            file_ext = ".png"
-        else:
-            file_ext = ".jpg"
-            
-    filename = f"{datetime.now().strftime('%Y%m%d')}_{uuid.uuid4().hex}{file_ext}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    
+    # 请求体明显超限时直接拒绝
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD:
+        raise HTTPException(status_code=413, detail=f"File exceeds {UPLOAD_MAX_BYTES} bytes")
+
+    # 边接收边写盘，文件类型按内容判断（不信任 content_type 和扩展名），超过上限立即中止
+    start = time.perf_counter()
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        name, size = await receive_upload(request)
+    except HTTPException:
+        upload_duration.observe(time.perf_counter() - start, "rejected")
+        raise
     except Exception as e:
+        upload_duration.observe(time.perf_counter() - start, "error")
         raise HTTPException(status_code=500, detail=f"Could not save file: {str(e)}")
-        
+    upload_duration.observe(time.perf_counter() - start, "ok")
+    upload_bytes.inc(amount=size)
+    # 后台预生成缩略图，列表页可直接请求 /uploads/...?w=128
+    schedule_thumbnails(name)
+
     # Return the relative URL path
     # Note: The frontend should prepend the base URL
-    return {"url": f"/uploads/{filename}"}
+    return {"url": f"/uploads/{name}"}
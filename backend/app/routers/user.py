@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.schemas.user import RegisterRequest, ChangePasswordRequest, DeleteAccountRequest, UserResponse, UserUpdate
@@ -22,7 +22,7 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), ser
     user = service.repo.find_user_by_username(form_data.username)
     if user is None or not verify_password(form_data.password, user.password):
         raise HTTPException(status_code=401, detail="Incorrect username or password")
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data={"sub": user.username, "uid": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -65,7 +65,8 @@ def update_password(
 @router.post("/user/delete")
 def delete_account(
     payload: DeleteAccountRequest,
+    background_tasks: BackgroundTasks,
     current_username: str = Depends(get_current_user),
     service: UserService = Depends(get_user_service)
 ):
-    return service.delete_account(current_username, payload.password, payload.avatar_url)
+    return service.delete_account(current_username, payload.password, background_tasks)
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+
+from .transaction import TransactionResponse
+from .ledger import LedgerResponse
+from .budget import BudgetResponse
+
+
+class SyncDeleted(BaseModel):
+    transactions: list[int] = Field(default_factory=list)
+    ledgers: list[int] = Field(default_factory=list)
+    budgets: list[int] = Field(default_factory=list)
+
+
+class SyncResponse(BaseModel):
+    transactions: list[TransactionResponse]
+    ledgers: list[LedgerResponse]
+    budgets: list[BudgetResponse]
+    deleted: SyncDeleted
+    next_token: str = Field(..., description="下次同步时作为 since 传入")
+    has_more: bool = Field(..., description="是否还有未返回的变更，为 true 时应立即用 next_token 继续同步")
@@ -1,6 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Literal, Optional
 
 
 class TransactionCreate(BaseModel):
@@ -38,12 +38,76 @@ class TransactionResponse(BaseModel):
 
 
 class TransactionListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: list[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+
+class CategorySummary(BaseModel):
+    category: str
+    income: float
+    expense: float
+
+
+class MonthSummary(BaseModel):
+    month: str
+    income: float
+    expense: float
 
 
 class TransactionSummaryResponse(BaseModel):
     total_income: float
     total_expense: float
     balance: float
+    by_category: Optional[list[CategorySummary]] = None
+    by_month: Optional[list[MonthSummary]] = None
+
+
+
+class CategoryTotal(BaseModel):
+    category: str
+    amount: float
+    count: int
+
+
+class TransactionAnalyticsResponse(BaseModel):
+    timezone: str
+    days: list[str]
+    income: list[float]
+    expense: list[float]
+    income_by_category: list[CategoryTotal]
+    expense_by_category: list[CategoryTotal]
+    total_income: float
+    total_expense: float
+
+
+class TransactionImportError(BaseModel):
+    row: int
+    error: str
+
+
+class TransactionImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: list[TransactionImportError]
+
+
+class TransactionBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"] = Field(..., description="操作类型")
+    client_id: Optional[str] = Field(None, max_length=100, description="客户端 id，原样返回；update/delete 未给出 id 时指向本批中 create 的记录")
+    id: Optional[int] = Field(None, description="交易 id（update/delete）")
+    data: Optional[dict[str, Any]] = Field(None, description="create 时同 TransactionCreate，update 时同 TransactionUpdate")
+
+
+class TransactionBatchRequest(BaseModel):
+    operations: list[TransactionBatchOperation] = Field(..., min_length=1, max_length=1000)
+
+
+class TransactionBatchResult(BaseModel):
+    client_id: Optional[str]
+    op: str
+    id: int
+
 
+class TransactionBatchResponse(BaseModel):
+    results: list[TransactionBatchResult]
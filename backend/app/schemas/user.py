@@ -23,7 +23,7 @@ class ChangePasswordRequest(BaseModel):
 
 class DeleteAccountRequest(BaseModel):
     password: str
-    avatar_url: str | None = None
+    avatar_url: str | None = None  # 已废弃：头像等上传文件按数据库中的引用删除
 
 
 class UserResponse(BaseModel):
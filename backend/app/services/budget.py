@@ -1,24 +1,46 @@
+import os
+
 from fastapi import Depends
 from sqlmodel import Session
-from ..core.db import get_session
+from ..core.db import get_session, AsyncSessionDep, AsyncProxy
+from ..core.cache import UserResultCache
 from ..crud.budget import BudgetRepo
+from ..crud.data_version import DataVersionRepo
 from ..schemas.budget import BudgetCreate, BudgetUpdate
 from ..models.budget import Budget
 
+# 按月预算缓存，键为 (用户, 月份)；该用户的预算写入提交后失效
+budget_cache = UserResultCache(
+    maxsize=int(os.getenv("BUDGET_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("BUDGET_CACHE_TTL", "300"))
+)
+
 class BudgetService:
     def __init__(self, repo: BudgetRepo):
         self.repo = repo
+        self.data_versions = DataVersionRepo(repo.session)
 
     def set_budget(self, user_id: int, budget_in: BudgetCreate) -> Budget:
         # Check if budget already exists
         existing_budget = self.repo.get_budget(user_id, budget_in.month, budget_in.category)
+        self.data_versions.bump(user_id)
         if existing_budget:
-            return self.repo.update_budget(existing_budget, BudgetUpdate(amount=budget_in.amount))
+            budget = self.repo.update_budget(existing_budget, BudgetUpdate(amount=budget_in.amount))
         else:
-            return self.repo.create_budget(user_id, budget_in)
+            budget = self.repo.create_budget(user_id, budget_in)
+        budget_cache.invalidate(user_id)
+        return budget
 
     def get_budgets(self, user_id: int, month: str) -> list[Budget]:
-        return self.repo.get_budgets_by_month(user_id, month)
+        # 缓存脱离会话的副本，避免跨请求共享 ORM 实例
+        return budget_cache.get_or_compute(
+            user_id, month,
+            lambda: [Budget.model_validate(budget) for budget in self.repo.get_budgets_by_month(user_id, month)]
+        )
 
 def get_budget_service(session: Session = Depends(get_session)) -> BudgetService:
     return BudgetService(BudgetRepo(session))
+
+async def get_async_budget_service(session: AsyncSessionDep) -> AsyncProxy:
+    """方法与 BudgetService 相同，但均为协程"""
+    return AsyncProxy(session, lambda session: BudgetService(BudgetRepo(session)))
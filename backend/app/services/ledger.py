@@ -1,13 +1,15 @@
 from fastapi import Depends, HTTPException
 
-from ..crud.ledger import LedgerRepo
+from ..crud.ledger import LedgerRepo, LIST_COLUMNS
+from ..crud.data_version import DataVersionRepo
 from ..models.ledger import Ledger
-from ..core.db import SessionDep
+from ..core.db import SessionDep, AsyncSessionDep, AsyncProxy
 
 
 class LedgerService:
     def __init__(self, repo: LedgerRepo):
         self.repo = repo
+        self.data_versions = DataVersionRepo(repo.session)
 
     def create_ledger(
         self,
@@ -20,6 +22,7 @@ class LedgerService:
             name=name,
             description=description
         )
+        self.data_versions.bump(user_id)
         return self.repo.create_ledger(ledger)
 
     def get_ledger(self, ledger_id: int, user_id: int):
@@ -34,12 +37,21 @@ class LedgerService:
         skip: int = 0,
         limit: int = 100
     ):
+        """返回 LIST_COLUMNS 行元组"""
         return self.repo.get_user_ledgers(
             user_id=user_id,
             skip=skip,
-            limit=limit
+            limit=limit,
+            columns=LIST_COLUMNS
         )
 
+    def count_ledgers(self, user_id: int) -> int:
+        return self.repo.count_user_ledgers(user_id)
+
+    def list_ledgers(self, user_id: int, skip: int = 0, limit: int = 100) -> tuple[list, int]:
+        """一页账本和总数；通过 AsyncProxy 调用时只占用一次线程池调度"""
+        return self.get_ledgers(user_id, skip, limit), self.count_ledgers(user_id)
+
     def update_ledger(
         self,
         ledger_id: int,
@@ -55,13 +67,19 @@ class LedgerService:
             ledger.name = name
         if description is not None:
             ledger.description = description
+        self.data_versions.bump(user_id)
         
         return self.repo.update_ledger(ledger)
 
     def delete_ledger(self, ledger_id: int, user_id: int):
+        self.data_versions.bump(user_id)
         return self.repo.delete_ledger(ledger_id, user_id)
 
 
 def get_ledger_service(repo: LedgerRepo = Depends(LedgerRepo)) -> LedgerService:
     return LedgerService(repo)
 
+
+async def get_async_ledger_service(session: AsyncSessionDep) -> AsyncProxy:
+    """方法与 LedgerService 相同，但均为协程"""
+    return AsyncProxy(session, lambda session: LedgerService(LedgerRepo(session)))
@@ -0,0 +1,57 @@
+from typing import Optional
+
+from fastapi import HTTPException
+
+from ..crud.change_log import ChangeLogRepo
+from ..crud.transaction import LIST_COLUMNS as TRANSACTION_COLUMNS
+from ..crud.ledger import LIST_COLUMNS as LEDGER_COLUMNS
+from ..crud.budget import LIST_COLUMNS as BUDGET_COLUMNS
+from ..models.transaction import Transaction
+from ..models.ledger import Ledger
+from ..models.budget import Budget
+from ..core.db import AsyncSessionDep, AsyncProxy
+from ..core.responses import rows_to_dicts
+
+# 实体名 -> (响应中的键, 模型, 查询的列)
+SYNC_ENTITIES = {
+    "transaction": ("transactions", Transaction, TRANSACTION_COLUMNS),
+    "ledger": ("ledgers", Ledger, LEDGER_COLUMNS),
+    "budget": ("budgets", Budget, BUDGET_COLUMNS),
+}
+
+
+class SyncService:
+    def __init__(self, repo: ChangeLogRepo):
+        self.repo = repo
+
+    def get_changes(self, user_id: int, since: Optional[str] = None, limit: int = 500) -> dict:
+        """返回 since 之后变更的记录和已删除记录的 id；since 为空时返回全部现有记录（不含墓碑）"""
+        if since is not None and not since.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+        since_id = int(since) if since else 0
+
+        changes = self.repo.get_changes(user_id, since_id, limit + 1, include_deleted=since is not None)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        result = {key: [] for key, _, _ in SYNC_ENTITIES.values()}
+        deleted = {key: [] for key, _, _ in SYNC_ENTITIES.values()}
+        for entity, (key, model, columns) in SYNC_ENTITIES.items():
+            ids = [change.entity_id for change in changes if change.entity == entity and not change.deleted]
+            deleted[key] = [change.entity_id for change in changes if change.entity == entity and change.deleted]
+            if ids:
+                result[key] = rows_to_dicts(columns, self.repo.get_rows(model, columns, user_id, ids))
+
+        if changes:
+            next_token = changes[-1].id
+        elif since is None:
+            # 首次同步跳过了墓碑，从最新的变更之后开始
+            next_token = self.repo.get_latest_id(user_id)
+        else:
+            next_token = since_id
+        return {**result, "deleted": deleted, "next_token": str(next_token), "has_more": has_more}
+
+
+async def get_async_sync_service(session: AsyncSessionDep) -> AsyncProxy:
+    """方法与 SyncService 相同，但均为协程"""
+    return AsyncProxy(session, lambda session: SyncService(ChangeLogRepo(session)))
@@ -1,15 +1,103 @@
 from fastapi import Depends, HTTPException
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from pydantic import ValidationError
+import base64
+import binascii
+import csv
+import io
+import json
+import os
+from typing import BinaryIO, Iterator, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from ..crud.transaction import TransactionRepo
+from sqlmodel import Session
+
+from ..crud.transaction import TransactionRepo, EXPORT_COLUMNS, LIST_COLUMNS
+from ..crud.daily_total import DailyTotalDeltas, DailyTotalRepo
+from ..crud.data_version import DataVersionRepo
+from ..crud.change_log import ChangeLogRepo
 from ..models.transaction import Transaction
-from ..core.db import SessionDep
+from ..schemas.transaction import TransactionCreate, TransactionUpdate, TransactionBatchOperation
+from ..core.db import SessionDep, AsyncSessionDep, AsyncProxy
+from ..core.cache import UserResultCache
+
+
+IMPORT_BATCH_SIZE = 5000
+IMPORT_MAX_ERRORS = 1000
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "ndjson"}
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+# 统计摘要缓存，键为 (用户, 归一化的日期区间, 明细选项)；该用户的交易写入提交后失效
+summary_cache = UserResultCache(
+    maxsize=int(os.getenv("SUMMARY_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("SUMMARY_CACHE_TTL", "300"))
+)
+
+
+def encode_cursor(transaction: Transaction) -> str:
+    raw = f"{transaction.date.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date, id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(date), int(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _read_records(file: BinaryIO, format: str) -> Iterator[tuple[int, object]]:
+    """逐行产出 (行号, 记录)；无法解析的行产出 ValueError"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if format == "csv":
+            for row, record in enumerate(csv.DictReader(text), start=1):
+                yield row, {key: value for key, value in record.items() if key is not None and value != ""}
+        else:
+            for row, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield row, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield row, ValueError(f"Invalid JSON: {e.msg}")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    finally:
+        text.detach()
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """带时区的时间换算为不带时区的 UTC 时间，与数据库中的存储方式一致"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _format_error(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+            for e in error.errors()
+        )
+    return str(error)
 
 
 class TransactionService:
     def __init__(self, repo: TransactionRepo):
         self.repo = repo
+        self.daily_totals = DailyTotalRepo(repo.session)
+        self.data_versions = DataVersionRepo(repo.session)
+        self.changes = ChangeLogRepo(repo.session)
 
     def create_transaction(
         self,
@@ -21,6 +109,24 @@ class TransactionService:
         image_path: Optional[str] = None,
         date: Optional[datetime] = None
     ):
+        transaction = self._new_transaction(user_id, type, amount, category, description, image_path, date)
+        self.data_versions.bump(user_id)
+        transaction = self.repo.create_transaction(transaction)
+        summary_cache.invalidate(user_id)
+        return transaction
+
+    def _new_transaction(
+        self,
+        user_id: int,
+        type: str,
+        amount: float,
+        category: str,
+        description: Optional[str] = None,
+        image_path: Optional[str] = None,
+        date: Optional[datetime] = None,
+        totals: DailyTotalRepo | DailyTotalDeltas | None = None
+    ) -> Transaction:
+        """校验并构造交易记录，同时累加汇总增量；totals 默认为 self.daily_totals"""
         if type not in ["income", "expense"]:
             raise HTTPException(status_code=400, detail="Type must be 'income' or 'expense'")
         
@@ -36,7 +142,153 @@ class TransactionService:
             image_path=image_path,
             date=date
         )
-        return self.repo.create_transaction(transaction)
+        (totals or self.daily_totals).add(transaction)
+        return transaction
+
+    def _change_transaction(
+        self,
+        transaction: Transaction,
+        type: Optional[str] = None,
+        amount: Optional[float] = None,
+        category: Optional[str] = None,
+        description: Optional[str] = None,
+        date: Optional[datetime] = None,
+        totals: DailyTotalRepo | DailyTotalDeltas | None = None
+    ):
+        """校验并修改交易记录的字段，同时调整汇总增量；totals 默认为 self.daily_totals"""
+        if type and type not in ["income", "expense"]:
+            raise HTTPException(status_code=400, detail="Type must be 'income' or 'expense'")
+        
+        totals = totals or self.daily_totals
+        totals.remove(transaction)
+        if type:
+            transaction.type = type
+        if amount is not None:
+            transaction.amount = amount
+        if category:
+            transaction.category = category
+        if description is not None:
+            transaction.description = description
+        if date:
+            transaction.date = date
+        totals.add(transaction)
+
+    def import_transactions(self, user_id: int, file: BinaryIO, filename: str = "", format: Optional[str] = None):
+        """流式解析 CSV/NDJSON 并分批插入，全部在一个事务中提交；校验失败的行跳过并记录"""
+        if format is None:
+            format = IMPORT_FORMATS.get(os.path.splitext(filename)[1].lower())
+        if format not in ("csv", "ndjson"):
+            raise HTTPException(status_code=400, detail="Format must be 'csv' or 'ndjson'")
+
+        now = datetime.now()
+        imported = 0
+        failed = 0
+        errors = []
+        batch = []
+
+        # 批量插入绕过 ORM，不会触发变更记录；先写入版本号取得写锁，
+        # 此后 id 大于 last_id 的交易都由本次导入插入，提交前一并记入变更记录
+        self.data_versions.bump(user_id)
+        last_id = self.repo.get_max_id()
+
+        # 汇总增量在内存中累计，导入结束时一次写入
+        deltas: dict[tuple, list] = {}
+
+        def flush():
+            self.repo.bulk_insert(batch)
+            for t in batch:
+                delta = deltas.setdefault((t["date"].date(), t["type"], t["category"]), [0.0, 0])
+                delta[0] += t["amount"]
+                delta[1] += 1
+            batch.clear()
+
+        for row, record in _read_records(file, format):
+            try:
+                if isinstance(record, ValueError):
+                    raise record
+                if not isinstance(record, dict):
+                    raise ValueError("Row must be an object")
+                item = TransactionCreate.model_validate(record)
+                if item.type not in ["income", "expense"]:
+                    raise ValueError("Type must be 'income' or 'expense'")
+            except (ValidationError, ValueError) as e:
+                failed += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append({"row": row, "error": _format_error(e)})
+                continue
+
+            batch.append({
+                "user_id": user_id,
+                "type": item.type,
+                "amount": item.amount,
+                "category": item.category,
+                "description": item.description,
+                "image_path": item.image_path,
+                "date": item.date or now,
+                "created_at": now
+            })
+            imported += 1
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+
+        flush()
+        self.daily_totals.add_deltas(user_id, deltas)
+        if imported:
+            self.changes.record_transactions_after(user_id, last_id)
+        self.repo.session.commit()
+        summary_cache.invalidate(user_id)
+        return {"imported": imported, "failed": failed, "errors": errors}
+
+    def export_transactions(
+        self,
+        user_id: int,
+        format: str = "csv",
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Iterator[bytes]:
+        """按筛选条件导出交易记录，逐块产出约 64KB 的 CSV/NDJSON 数据"""
+        if format not in EXPORT_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail="Format must be 'csv' or 'ndjson'")
+        if type and type not in ["income", "expense"]:
+            raise HTTPException(status_code=400, detail="Type must be 'income' or 'expense'")
+
+        columns = [column.key for column in EXPORT_COLUMNS]
+        bind = self.repo.session.get_bind()
+
+        def generate() -> Iterator[bytes]:
+            # 响应在请求依赖关闭后才开始发送，需使用独立的会话
+            with Session(bind) as session:
+                rows = TransactionRepo(session).iter_user_transactions(
+                    user_id=user_id,
+                    type=type,
+                    category=category,
+                    start_date=start_date,
+                    end_date=end_date
+                )
+                buffer = io.StringIO()
+                if format == "csv":
+                    writer = csv.writer(buffer)
+                    writer.writerow(columns)
+
+                    def write(row):
+                        writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+                else:
+                    def write(row):
+                        buffer.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default))
+                        buffer.write("\n")
+
+                for row in rows:
+                    write(row)
+                    if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                        yield buffer.getvalue().encode()
+                        buffer.seek(0)
+                        buffer.truncate()
+                if buffer.tell():
+                    yield buffer.getvalue().encode()
+
+        return generate()
 
     def get_transaction(self, transaction_id: int, user_id: int):
         transaction = self.repo.get_transaction_by_id(transaction_id, user_id)
@@ -67,6 +319,88 @@ class TransactionService:
             end_date=end_date
         )
 
+    def get_transaction_page(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> tuple[list, Optional[str]]:
+        """返回一页交易记录（LIST_COLUMNS 行元组）及下一页游标；多取一条用于判断是否还有下一页"""
+        if type and type not in ["income", "expense"]:
+            raise HTTPException(status_code=400, detail="Type must be 'income' or 'expense'")
+
+        before = decode_cursor(cursor) if cursor else None
+        transactions = self.repo.get_user_transactions(
+            user_id=user_id,
+            skip=skip,
+            limit=limit + 1,
+            type=type,
+            category=category,
+            start_date=start_date,
+            end_date=end_date,
+            before=before,
+            columns=LIST_COLUMNS
+        )
+        if len(transactions) <= limit:
+            return transactions, None
+        transactions = transactions[:limit]
+        return transactions, encode_cursor(transactions[-1])
+
+    def list_transactions(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> tuple[list, Optional[str], Optional[int]]:
+        """一页记录、下一页游标和总数；通过 AsyncProxy 调用时只占用一次线程池调度"""
+        rows, next_cursor = self.get_transaction_page(
+            user_id=user_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            type=type,
+            category=category,
+            start_date=start_date,
+            end_date=end_date
+        )
+        total = None
+        if include_total:
+            total = self.count_transactions(
+                user_id=user_id,
+                type=type,
+                category=category,
+                start_date=start_date,
+                end_date=end_date
+            )
+        return rows, next_cursor, total
+
+    def count_transactions(
+        self,
+        user_id: int,
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> int:
+        return self.repo.count_user_transactions(
+            user_id=user_id,
+            type=type,
+            category=category,
+            start_date=start_date,
+            end_date=end_date
+        )
+
     def update_transaction(
         self,
         transaction_id: int,
@@ -81,34 +415,163 @@ class TransactionService:
         if transaction is None:
             raise HTTPException(status_code=404, detail="Transaction not found")
         
-        if type and type not in ["income", "expense"]:
-            raise HTTPException(status_code=400, detail="Type must be 'income' or 'expense'")
-        
-        if type:
-            transaction.type = type
-        if amount is not None:
-            transaction.amount = amount
-        if category:
-            transaction.category = category
-        if description is not None:
-            transaction.description = description
-        if date:
-            transaction.date = date
+        self._change_transaction(transaction, type, amount, category, description, date)
+        self.data_versions.bump(user_id)
         
-        return self.repo.update_transaction(transaction)
+        transaction = self.repo.update_transaction(transaction)
+        summary_cache.invalidate(user_id)
+        return transaction
 
     def delete_transaction(self, transaction_id: int, user_id: int):
-        return self.repo.delete_transaction(transaction_id, user_id)
+        transaction = self.repo.get_transaction_by_id(transaction_id, user_id)
+        if transaction is None:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        self.daily_totals.remove(transaction)
+        self.data_versions.bump(user_id)
+        result = self.repo.delete_transaction(transaction_id, user_id)
+        summary_cache.invalidate(user_id)
+        return result
+
+    def apply_batch(self, user_id: int, operations: list[TransactionBatchOperation]) -> dict:
+        """在一个事务中依次执行 create/update/delete 操作，只提交一次；任一操作失败则全部回滚
+
+        update/delete 未给出 id 时，按 client_id 指向本批中此前 create 的记录。
+        """
+        results = []
+        created: dict[str, int] = {}
+        # 汇总增量在内存中按 (日期, 类型, 分类) 合并，提交前一次写入，而不是每个操作各执行一次 upsert
+        totals = DailyTotalDeltas()
+        try:
+            for index, operation in enumerate(operations):
+                try:
+                    results.append(self._apply_operation(user_id, operation, created, totals))
+                except ValidationError as e:
+                    raise HTTPException(status_code=422, detail={
+                        "index": index, "client_id": operation.client_id, "error": _format_error(e)
+                    })
+                except HTTPException as e:
+                    raise HTTPException(status_code=e.status_code, detail={
+                        "index": index, "client_id": operation.client_id, "error": e.detail
+                    })
+            self.daily_totals.add_deltas(user_id, totals.deltas)
+            self.data_versions.bump(user_id)
+            self.repo.session.commit()
+        except BaseException:
+            self.repo.session.rollback()
+            raise
+        summary_cache.invalidate(user_id)
+        return {"results": results}
+
+    def _apply_operation(
+        self,
+        user_id: int,
+        operation: TransactionBatchOperation,
+        created: dict[str, int],
+        totals: DailyTotalDeltas
+    ) -> dict:
+        if operation.op == "create":
+            item = TransactionCreate.model_validate(operation.data or {})
+            transaction = self.repo.add_transaction(self._new_transaction(
+                user_id, item.type, item.amount, item.category, item.description, item.image_path, item.date, totals
+            ))
+            if operation.client_id is not None:
+                created[operation.client_id] = transaction.id
+            return {"client_id": operation.client_id, "op": operation.op, "id": transaction.id}
+
+        transaction_id = operation.id if operation.id is not None else created.get(operation.client_id)
+        if transaction_id is None:
+            raise HTTPException(status_code=400, detail="id is required for update and delete")
+        transaction = self.repo.get_transaction_by_id(transaction_id, user_id)
+        if transaction is None:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        if operation.op == "update":
+            item = TransactionUpdate.model_validate(operation.data or {})
+            self._change_transaction(
+                transaction, item.type, item.amount, item.category, item.description, item.date, totals
+            )
+            self.repo.touch_transaction(transaction)
+        else:
+            totals.remove(transaction)
+            self.repo.remove_transaction(transaction)
+        return {"client_id": operation.client_id, "op": operation.op, "id": transaction_id}
 
     def get_summary(
         self,
         user_id: int,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        by_category: bool = False,
+        by_month: bool = False
     ):
-        return self.repo.get_user_summary(user_id, start_date, end_date)
+        # 与 get_user_summary 一致地去掉时区，使等价的区间命中同一个缓存键
+        key = (
+            start_date.replace(tzinfo=None) if start_date else None,
+            end_date.replace(tzinfo=None) if end_date else None,
+            by_category,
+            by_month
+        )
+        return summary_cache.get_or_compute(
+            user_id, key,
+            lambda: self.repo.get_user_summary(user_id, start_date, end_date, by_category, by_month)
+        )
+
+    def get_analytics(
+        self,
+        user_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        tz: str = "UTC"
+    ):
+        try:
+            zone = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+
+        # 交易时间按 UTC 存储（不带时区）；带时区的参数先换算为 UTC，不带时区的视为 UTC
+        start_date = _as_utc(start_date)
+        end_date = _as_utc(end_date)
+        # 取区间起点处的偏移量，在 SQL 中按本地日期分桶
+        reference = start_date.replace(tzinfo=timezone.utc) if start_date else datetime.now(timezone.utc)
+        offset = reference.astimezone(zone).utcoffset()
+        offset_minutes = int(offset.total_seconds() // 60) if offset else 0
+
+        rows = self.repo.get_user_analytics(user_id, start_date, end_date, offset_minutes)
+
+        daily: dict[str, dict[str, float]] = {}
+        categories: dict[str, dict[str, list]] = {"income": {}, "expense": {}}
+        for day, kind, category, amount, count in rows:
+            bucket = daily.setdefault(day, {"income": 0.0, "expense": 0.0})
+            bucket[kind] = bucket.get(kind, 0.0) + float(amount)
+            totals = categories.setdefault(kind, {}).setdefault(category, [0.0, 0])
+            totals[0] += float(amount)
+            totals[1] += count
+
+        def by_category(kind: str) -> list[dict]:
+            items = [
+                {"category": category, "amount": amount, "count": count}
+                for category, (amount, count) in categories[kind].items()
+            ]
+            return sorted(items, key=lambda item: item["amount"], reverse=True)
+
+        days = sorted(daily)
+        income_by_category = by_category("income")
+        expense_by_category = by_category("expense")
+        return {
+            "timezone": tz,
+            "days": days,
+            "income": [daily[d]["income"] for d in days],
+            "expense": [daily[d]["expense"] for d in days],
+            "income_by_category": income_by_category,
+            "expense_by_category": expense_by_category,
+            "total_income": sum(item["amount"] for item in income_by_category),
+            "total_expense": sum(item["amount"] for item in expense_by_category)
+        }
 
 
 def get_transaction_service(repo: TransactionRepo = Depends(TransactionRepo)) -> TransactionService:
     return TransactionService(repo)
 
+
+async def get_async_transaction_service(session: AsyncSessionDep) -> AsyncProxy:
+    """方法与 TransactionService 相同，但均为协程；工厂本身不做 IO，定义为协程免去一次线程池调度"""
+    return AsyncProxy(session, lambda session: TransactionService(TransactionRepo(session)))
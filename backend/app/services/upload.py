@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Iterator
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.core.storage import UPLOAD_DIR, UPLOAD_URL_PREFIX, content_digest, upload_path
+from app.core.thumbnails import THUMBNAIL_DIR, THUMBNAIL_EXTENSIONS, remove_thumbnails
+from app.crud.upload import REF_BATCH_SIZE, UploadRefRepo
+
+logger = logging.getLogger("app.upload")
+
+# 内容寻址文件可能刚被新的上传复用、尚未写入引用，修改时间在宽限期内的不删除
+UPLOAD_ORPHAN_GRACE = int(os.getenv("UPLOAD_ORPHAN_GRACE", "3600"))
+# 后台定期回收未引用文件的间隔（秒），0 表示不启用，只能通过命令行运行
+UPLOAD_GC_INTERVAL = int(os.getenv("UPLOAD_GC_INTERVAL", "0"))
+# 上传和生成缩略图时使用的临时文件前缀，残留的临时文件同样按宽限期回收
+TEMP_PREFIXES = (".upload-", ".thumb-")
+
+
+def release_uploads(urls: list[str], bind: Engine = engine, grace: int = UPLOAD_ORPHAN_GRACE) -> list[str]:
+    """删除已不再被引用的上传文件（用于后台任务），返回删除的 URL"""
+    with Session(bind) as session:
+        referenced = UploadRefRepo(session).referenced(urls)
+    cutoff = time.time() - grace
+    removed = []
+    for url in dict.fromkeys(urls):
+        path = upload_path(url)
+        if url in referenced or path is None:
+            continue
+        name = os.path.relpath(path, UPLOAD_DIR)
+        try:
+            if content_digest(name) and os.stat(path).st_mtime > cutoff:
+                continue
+            os.remove(path)
+        except OSError:
+            continue
+        remove_thumbnails(name.replace(os.sep, "/"))
+        removed.append(url)
+    return removed
+
+
+def iter_files(root: str, skip: str | None = None) -> Iterator[tuple[str, os.stat_result]]:
+    """逐个遍历目录下的文件，返回 (路径, stat)，不一次性列出整个目录树"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path != skip:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    try:
+                        yield entry.path, entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+    except OSError:
+        return False
+    # 顺带清理空的分片目录
+    parent = os.path.dirname(path)
+    while parent not in (UPLOAD_DIR, THUMBNAIL_DIR, ""):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+    return True
+
+
+def collect_garbage(
+    bind: Engine = engine,
+    grace: int = UPLOAD_ORPHAN_GRACE,
+    dry_run: bool = False,
+    batch_size: int = REF_BATCH_SIZE,
+) -> dict:
+    """删除上传目录中未被交易图片或头像引用、且超过宽限期的文件及其缩略图
+
+    dry_run 时只统计不删除。返回扫描文件数、孤立文件数、删除文件数和回收字节数。
+    """
+    cutoff = time.time() - grace
+    stats = {"scanned": 0, "orphaned": 0, "removed": 0, "reclaimed_bytes": 0, "dry_run": dry_run}
+
+    # 本次回收的源文件（去掉扩展名），其缩略图一并回收
+    orphan_stems = set()
+
+    def reclaim(path: str, size: int):
+        stats["orphaned"] += 1
+        if dry_run:
+            stats["reclaimed_bytes"] += size
+        elif _remove(path):
+            stats["removed"] += 1
+            stats["reclaimed_bytes"] += size
+
+    def flush(batch: list[tuple[str, str, int]]):
+        with Session(bind) as session:
+            referenced = UploadRefRepo(session).referenced([url for url, _, _ in batch])
+        for url, path, size in batch:
+            if url in referenced:
+                continue
+            # 扫描之后相同内容的上传会复用该文件并刷新修改时间，删除前再检查一次
+            try:
+                if os.stat(path).st_mtime > cutoff:
+                    continue
+            except OSError:
+                continue
+            orphan_stems.add(os.path.splitext(path)[0])
+            reclaim(path, size)
+
+    if not os.path.isdir(UPLOAD_DIR):
+        return stats
+    batch = []
+    for path, stat_result in iter_files(UPLOAD_DIR, skip=THUMBNAIL_DIR):
+        stats["scanned"] += 1
+        if stat_result.st_mtime > cutoff:
+            continue
+        if os.path.basename(path).startswith(TEMP_PREFIXES):
+            reclaim(path, stat_result.st_size)
+            continue
+        name = os.path.relpath(path, UPLOAD_DIR).replace(os.sep, "/")
+        batch.append((UPLOAD_URL_PREFIX + name, path, stat_result.st_size))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    # 源文件已不存在的缩略图（uploads/.thumbs/<宽度>/<相对路径>）
+    if os.path.isdir(THUMBNAIL_DIR):
+        for path, stat_result in iter_files(THUMBNAIL_DIR):
+            stats["scanned"] += 1
+            name = os.path.relpath(path, THUMBNAIL_DIR).split(os.sep, 1)[-1]
+            stem = os.path.join(UPLOAD_DIR, os.path.splitext(name)[0])
+            if stem in orphan_stems:
+                reclaim(path, stat_result.st_size)
+            elif stat_result.st_mtime <= cutoff and (
+                os.path.basename(path).startswith(TEMP_PREFIXES)
+                or not any(os.path.exists(stem + ext) for ext in THUMBNAIL_EXTENSIONS)
+            ):
+                reclaim(path, stat_result.st_size)
+    return stats
+
+
+async def run_garbage_collector(interval: int = UPLOAD_GC_INTERVAL):
+    """后台定期回收未引用的上传文件，扫描和删除在线程池中进行"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            stats = await run_in_threadpool(collect_garbage)
+        except Exception:
+            logger.exception("Upload garbage collection failed")
+            continue
+        logger.info("Upload garbage collection: %s", stats)
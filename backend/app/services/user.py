@@ -1,11 +1,19 @@
-from fastapi import Depends
+from fastapi import BackgroundTasks, Depends
 
 from app.crud.user import UserRepo
 from app.models.user import Users
 from app.core.security import hash_text
+from app.core.deps import deleted_user_ids, user_id_cache
 from app.crud.transaction import TransactionRepo
 from app.crud.ledger import LedgerRepo
-import os
+from app.crud.daily_total import DailyTotalRepo
+from app.crud.budget import BudgetRepo
+from app.crud.profile import ProfileRepo
+from app.crud.data_version import DataVersionRepo
+from app.crud.change_log import ChangeLogRepo
+from app.services.upload import release_uploads
+from app.services.transaction import summary_cache
+from app.services.budget import budget_cache
 
 
 class UserService:
@@ -40,7 +48,7 @@ class UserService:
         self.repo.update_avatar(user, avatar_path)
         return user
 
-    def delete_account(self, username: str, password: str, avatar_url: str | None = None):
+    def delete_account(self, username: str, password: str, background_tasks: BackgroundTasks):
         from fastapi import HTTPException
         from app.core.security import verify_password
         user = self.repo.find_user_by_username(username)
@@ -48,22 +56,32 @@ class UserService:
             raise HTTPException(status_code=404, detail="User not found")
         if not verify_password(password, user.password):
             raise HTTPException(status_code=401, detail="Incorrect password")
-        # Delete related resources
-        tx_repo = TransactionRepo(self.repo.session)
-        ledger_repo = LedgerRepo(self.repo.session)
+        session = self.repo.session
+        tx_repo = TransactionRepo(session)
+        profile_repo = ProfileRepo(session)
+        # Collect uploaded files referenced by the user's rows before deleting them
+        profile = profile_repo.get_by_user_id(user.id)
+        uploads = tx_repo.get_image_paths_for_user(user.id)
+        uploads += [url for url in (user.avatar_path, profile.avatar_url if profile else None) if url]
+        # Delete related resources with set-based statements; delete_user commits them all at once
+        DailyTotalRepo(session).delete_all_for_user(user_id=user.id)
         tx_repo.delete_all_for_user(user_id=user.id)
-        ledger_repo.delete_all_for_user(user_id=user.id)
-        # Delete avatar file if provided
-        if avatar_url and avatar_url.startswith("/uploads/"):
-            filename = os.path.basename(avatar_url)
-            file_path = os.path.join("uploads", filename)
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            except Exception:
-                pass
+        LedgerRepo(session).delete_all_for_user(user_id=user.id)
+        BudgetRepo(session).delete_all_for_user(user_id=user.id)
+        profile_repo.delete_for_user(user_id=user.id)
+        ChangeLogRepo(session).delete_all_for_user(user_id=user.id)
+        # Keep the data version row and bump it, so cached ETags never match a reused user id
+        DataVersionRepo(session).bump(user.id)
         # Delete user
         self.repo.delete_user(user)
+        # 只对当前进程生效：其他 worker 在 token 过期前仍接受该账号的 token，见 get_user_id
+        deleted_user_ids.set(user.id, True)
+        user_id_cache.invalidate(username)
+        summary_cache.invalidate(user.id)
+        budget_cache.invalidate(user.id)
+        # Release files after the response is sent; content-addressed files shared
+        # with other users stay on disk while they are still referenced
+        background_tasks.add_task(release_uploads, uploads)
         return {"detail": "Account deleted successfully"}
 
 def get_user_service(repo: UserRepo = Depends(UserRepo)) -> UserService:
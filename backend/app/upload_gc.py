@@ -0,0 +1,22 @@
+"""
+回收未被交易图片或头像引用的上传文件。
+
+用法:
+    python -m app.upload_gc --dry-run     # 只统计可回收的文件和字节数
+    python -m app.upload_gc --grace 600   # 删除修改时间超过 10 分钟的未引用文件
+"""
+import argparse
+
+from .services.upload import UPLOAD_ORPHAN_GRACE, collect_garbage
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove uploaded files that are no longer referenced")
+    parser.add_argument("--dry-run", action="store_true", help="report orphans without deleting them")
+    parser.add_argument("--grace", type=int, default=UPLOAD_ORPHAN_GRACE, help="skip files modified within this many seconds")
+    args = parser.parse_args()
+
+    stats = collect_garbage(grace=args.grace, dry_run=args.dry_run)
+    action = "Would remove" if args.dry_run else "Removed"
+    count = stats["orphaned"] if args.dry_run else stats["removed"]
+    print(f"Scanned {stats['scanned']} files. {action} {count} orphans, reclaiming {stats['reclaimed_bytes']} bytes")
@@ -0,0 +1,108 @@
+"""
+同步 / 异步数据库模式下的混合读写负载测试，对比各接口的延迟分位数。
+
+DB_ASYNC 在导入 app 时读取，因此每种模式在独立的子进程中运行。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.async_load --requests 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import percentile
+
+MODES = {"sync": "0", "async": "1"}
+
+
+async def run(requests: int, concurrency: int, rows: int) -> dict:
+    import httpx
+    from app.main import app
+    from app.migrate import upgrade
+
+    upgrade()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/register", json={"username": "bench", "password": "pw", "repeat_password": "pw"})
+        login = await client.post("/api/login", data={"username": "bench", "password": "pw"})
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        csv = "type,amount,category,date\n" + "\n".join(
+            f"{'income' if i % 5 == 0 else 'expense'},{i % 200 + 1},c{i % 12},"
+            f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}T{i % 24:02d}:00:00"
+            for i in range(rows)
+        )
+        await client.post("/api/transactions/import", files={"file": ("seed.csv", csv)})
+
+        # 70% 汇总（带明细）、20% 列表、10% 新增
+        scenarios = [
+            ("summary", "GET", "/api/transactions/summary/statistics",
+             {"params": {"start_date": "2025-01-01T08:30:00", "by_category": True, "by_month": True}}),
+        ] * 7 + [
+            ("list", "GET", "/api/transactions", {"params": {"limit": 50}}),
+        ] * 2 + [
+            ("create", "POST", "/api/transactions", {"json": {"type": "expense", "amount": 1, "category": "bench"}}),
+        ]
+        random.seed(0)
+        plan = [random.choice(scenarios) for _ in range(requests)]
+        latencies: dict[str, list[float]] = {}
+        queue = asyncio.Queue()
+        for item in plan:
+            queue.put_nowait(item)
+
+        async def worker():
+            while not queue.empty():
+                name, method, url, kwargs = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.request(method, url, **kwargs)
+                elapsed = (time.perf_counter() - start) * 1000
+                response.raise_for_status()
+                latencies.setdefault(name, []).append(elapsed)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - start
+
+    report = {"throughput_rps": round(requests / duration, 1), "endpoints": {}}
+    for name, values in sorted(latencies.items()):
+        report["endpoints"][name] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rows", type=int, default=50_000, help="transactions seeded before the run")
+    parser.add_argument("--mode", choices=list(MODES), help="run a single mode in this process")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(asyncio.run(run(args.requests, args.concurrency, args.rows))))
+        return
+
+    results = {}
+    for mode, flag in MODES.items():
+        env = dict(os.environ, DB_ASYNC=flag, DB_PATH=os.path.join(tempfile.mkdtemp(), "bench.db"))
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.async_load", "--mode", mode,
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency), "--rows", str(args.rows)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""基准脚本共用的统计和对比工具"""
+
+# benchmarks.seed 生成的用户的密码
+BENCH_PASSWORD = "bench"
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: dict[str, list[float]], duration: float, errors: dict[str, int] | None = None) -> dict:
+    """按接口汇总请求数、吞吐量和 p50/p95/p99 延迟（毫秒）"""
+    errors = errors or {}
+    report = {}
+    for name, values in sorted(latencies.items()):
+        report[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "rps": round(len(values) / duration, 1),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+    return report
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """与基线报告对比，返回吞吐量和各接口 p50/p95/p99 的变化百分比（正数表示变慢/吞吐下降）"""
+
+    def change(new: float, old: float) -> float | None:
+        return round((new - old) / old * 100, 1) if old else None
+
+    result = {"throughput_change_pct": change(report["throughput_rps"], baseline["throughput_rps"]), "endpoints": {}}
+    for name, stats in report["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(name)
+        if old is None:
+            continue
+        result["endpoints"][name] = {
+            f"{key}_change_pct": change(stats[key], old[key]) for key in ("p50_ms", "p95_ms", "p99_ms")
+        }
+    return result
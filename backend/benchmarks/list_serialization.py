@@ -0,0 +1,91 @@
+"""
+列表接口序列化微基准：对比 ORM 实例 + 逐条 model_validate + response_model 再校验（旧实现）
+与按列查询行元组 + orjson 一次序列化（当前实现）的每条记录耗时。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.list_serialization --sizes 1000 10000 --repeat 5
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, SQLModel
+
+from app.core.db import create_db_engine
+from app.core.responses import json_response, rows_to_dicts
+from app.crud.transaction import TransactionRepo, LIST_COLUMNS
+from app.schemas.transaction import TransactionListResponse, TransactionResponse
+from app.models import user, ledger, budget, profile, daily_total, data_version  # noqa: F401
+
+
+def seed(engine, rows: int):
+    start = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        TransactionRepo(session).bulk_insert([
+            {
+                "user_id": 1,
+                "type": "income" if i % 5 == 0 else "expense",
+                "amount": float(i % 200 + 1),
+                "category": f"c{i % 12}",
+                "description": f"item {i}",
+                "date": start + timedelta(minutes=37 * i),
+                "created_at": start,
+            }
+            for i in range(rows)
+        ])
+        session.commit()
+
+
+def orm_models(session: Session, limit: int) -> bytes:
+    """旧实现：ORM 实例 -> TransactionResponse -> FastAPI 按 response_model 再校验并序列化"""
+    transactions = TransactionRepo(session).get_user_transactions(user_id=1, limit=limit)
+    content = TransactionListResponse(
+        total=limit,
+        items=[TransactionResponse.model_validate(t) for t in transactions]
+    )
+    return TransactionListResponse.model_validate(content.model_dump()).model_dump_json().encode()
+
+
+def row_tuples(session: Session, limit: int) -> bytes:
+    """当前实现：按列查询行元组，转成字典后 orjson 一次序列化"""
+    rows = TransactionRepo(session).get_user_transactions(user_id=1, limit=limit, columns=LIST_COLUMNS)
+    return json_response({"total": limit, "items": rows_to_dicts(LIST_COLUMNS, rows), "next_cursor": None}).body
+
+
+MODES = {"orm_models": orm_models, "row_tuples": row_tuples}
+
+
+def measure(engine, mode: str, size: int, repeat: int) -> dict:
+    fn = MODES[mode]
+    timings = []
+    with Session(engine) as session:
+        fn(session, size)  # 预热
+        for _ in range(repeat):
+            session.expunge_all()
+            start = time.perf_counter()
+            body = fn(session, size)
+            timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "best_ms": round(best * 1000, 2),
+        "per_item_us": round(best / size * 1e6, 2),
+        "bytes": len(body),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_db_engine(":memory:")
+    SQLModel.metadata.create_all(engine)
+    seed(engine, max(args.sizes))
+
+    results = {}
+    for size in args.sizes:
+        results[size] = {mode: measure(engine, mode, size, args.repeat) for mode in MODES}
+        results[size]["speedup"] = round(results[size]["orm_models"]["best_ms"] / results[size]["row_tuples"]["best_ms"], 2)
+    print(json.dumps(results, indent=2))
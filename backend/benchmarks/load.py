@@ -0,0 +1,271 @@
+"""
+针对 benchmarks.seed 生成的数据库运行按场景混合的负载，输出各接口的吞吐量和 p50/p95/p99 延迟（JSON）。
+
+场景：
+    login       登录
+    dashboard   首页：本月汇总 + 本月预算 + 账本列表 + 最近 20 条交易
+    list_paging 按 cursor 连续翻 5 页交易列表
+    summary     带分类、月份明细的全量汇总
+    crud        新增 -> 修改 -> 删除一条交易
+
+运行方式：
+    默认在进程内通过 ASGI 直接调用 app，不经过网络；
+    --workers N 启动 uvicorn 多进程服务后通过 HTTP 压测；
+    --url 压测已经在运行的服务（--db 仅用于说明，需与服务使用的数据库一致）。
+
+crud 场景会写入数据库，需要可重复的结果时请先复制一份种子数据库。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.seed --db bench.db --users 100 --transactions 1000000
+    python -m benchmarks.load --db bench.db --requests 5000 --concurrency 32 --output report.json
+    python -m benchmarks.load --db bench.db --workers 4 --baseline report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.common import BENCH_PASSWORD, compare, summarize
+
+DEFAULT_MIX = "login=1,dashboard=4,list_paging=2,summary=2,crud=1"
+READY_TIMEOUT = 60
+
+
+class Recorder:
+    """记录每个接口的延迟（毫秒）和失败次数"""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def request(self, client, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.latencies.setdefault(name, []).append(elapsed)
+        if response.status_code >= 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            return None
+        return response
+
+
+async def login(client, recorder: Recorder, username: str) -> dict | None:
+    response = await recorder.request(client, "login", "POST", "/api/login",
+                                      data={"username": username, "password": BENCH_PASSWORD})
+    if response is None:
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def scenario_login(client, recorder, user):
+    await login(client, recorder, user["username"])
+
+
+async def scenario_dashboard(client, recorder, user):
+    headers = user["headers"]
+    now = datetime.now()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).isoformat()
+    await recorder.request(client, "dashboard.summary", "GET", "/api/transactions/summary/statistics",
+                           params={"start_date": month_start}, headers=headers)
+    await recorder.request(client, "dashboard.budgets", "GET", "/api/budgets",
+                           params={"month": now.strftime("%Y-%m")}, headers=headers)
+    await recorder.request(client, "dashboard.ledgers", "GET", "/api/ledgers", headers=headers)
+    await recorder.request(client, "dashboard.recent", "GET", "/api/transactions",
+                           params={"limit": 20, "include_total": False}, headers=headers)
+
+
+async def scenario_list_paging(client, recorder, user, pages: int = 5):
+    params = {"limit": 50}
+    for _ in range(pages):
+        response = await recorder.request(client, "list_paging", "GET", "/api/transactions",
+                                          params=params, headers=user["headers"])
+        if response is None:
+            return
+        cursor = response.json().get("next_cursor")
+        if cursor is None:
+            return
+        params = {"limit": 50, "cursor": cursor, "include_total": False}
+
+
+async def scenario_summary(client, recorder, user):
+    await recorder.request(client, "summary", "GET", "/api/transactions/summary/statistics",
+                           params={"by_category": True, "by_month": True}, headers=user["headers"])
+
+
+async def scenario_crud(client, recorder, user):
+    headers = user["headers"]
+    response = await recorder.request(client, "crud.create", "POST", "/api/transactions", headers=headers,
+                                      json={"type": "expense", "amount": 12.5, "category": "餐饮", "description": "bench"})
+    if response is None:
+        return
+    transaction_id = response.json()["id"]
+    await recorder.request(client, "crud.update", "PUT", f"/api/transactions/{transaction_id}",
+                           json={"amount": 13.5}, headers=headers)
+    await recorder.request(client, "crud.delete", "DELETE", f"/api/transactions/{transaction_id}", headers=headers)
+
+
+SCENARIOS = {
+    "login": scenario_login,
+    "dashboard": scenario_dashboard,
+    "list_paging": scenario_list_paging,
+    "summary": scenario_summary,
+    "crud": scenario_crud,
+}
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+async def run_load(client, requests: int, concurrency: int, users: int, mix: dict[str, int], seed: int) -> dict:
+    """requests 个场景按 mix 权重随机抽取，由 concurrency 个协程并发执行"""
+    recorder = Recorder()
+    accounts = []
+    for i in range(users):
+        headers = await login(client, recorder, f"bench{i}")
+        if headers is None:
+            raise SystemExit(f"login failed for bench{i}, was the database created by benchmarks.seed?")
+        accounts.append({"username": f"bench{i}", "headers": headers})
+    # 预热登录不计入结果
+    recorder = Recorder()
+
+    rng = random.Random(seed)
+    names = list(mix)
+    queue = asyncio.Queue()
+    for name in rng.choices(names, [mix[name] for name in names], k=requests):
+        queue.put_nowait((name, rng.choice(accounts)))
+
+    async def worker():
+        while not queue.empty():
+            name, user = queue.get_nowait()
+            await SCENARIOS[name](client, recorder, user)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+
+    total = sum(len(values) for values in recorder.latencies.values())
+    return {
+        "requests": total,
+        "scenarios": requests,
+        "duration_s": round(duration, 2),
+        "throughput_rps": round(total / duration, 1),
+        "endpoints": summarize(recorder.latencies, duration, recorder.errors),
+    }
+
+
+async def run_in_process(db: str, **options) -> dict:
+    import httpx
+
+    # DB_PATH 在导入 app 时读取
+    os.environ["DB_PATH"] = db
+    from app.main import app
+    from app.migrate import upgrade
+
+    # ASGITransport 不会触发 startup 事件
+    upgrade()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        return await run_load(client, **options)
+
+
+async def run_http(url: str, concurrency: int, **options) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+        return await run_load(client, concurrency=concurrency, **options)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db: str, workers: int) -> tuple[subprocess.Popen, str]:
+    """启动 uvicorn 多进程服务，等待其可以响应请求"""
+    import httpx
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=dict(os.environ, DB_PATH=db),
+    )
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"uvicorn exited with code {server.returncode}")
+        try:
+            httpx.get(f"{url}/api/me", timeout=1)
+            return server, url
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit(f"uvicorn did not start within {READY_TIMEOUT}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench.db", help="database created by benchmarks.seed")
+    parser.add_argument("--requests", type=int, default=2000, help="number of scenarios to run")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=10, help="how many of the seeded users to spread load over")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"scenario weights, default {DEFAULT_MIX}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=0, help="run against uvicorn with this many workers")
+    parser.add_argument("--url", help="run against an already running server")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare with")
+    args = parser.parse_args()
+
+    if not args.url and not os.path.exists(args.db):
+        raise SystemExit(f"{args.db} not found, create it with python -m benchmarks.seed")
+    options = dict(requests=args.requests, concurrency=args.concurrency, users=args.users,
+                   mix=args.mix, seed=args.seed)
+
+    if args.url:
+        mode = "http"
+        report = asyncio.run(run_http(args.url, **options))
+    elif args.workers:
+        mode = f"uvicorn x{args.workers}"
+        server, url = start_server(os.path.abspath(args.db), args.workers)
+        try:
+            report = asyncio.run(run_http(url, **options))
+        finally:
+            server.terminate()
+            server.wait()
+    else:
+        mode = "asgi"
+        report = asyncio.run(run_in_process(os.path.abspath(args.db), **options))
+
+    report = {"mode": mode, "concurrency": args.concurrency, "mix": args.mix, **report}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["baseline"] = compare(report, json.load(f))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+生成用于基准测试的 app.db：若干用户、账本、预算和大量交易记录。
+
+交易分布尽量接近真实数据：少数活跃用户产生大部分交易（幂律分布）；
+日期偏向最近，一天中集中在三餐时段；分类按权重抽取，金额按分类的对数正态分布；
+每月固定发放工资。相同 --seed 生成相同的数据。
+
+用户名为 bench0 .. bench{N-1}，密码均为 bench。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.seed --db bench.db --users 100 --transactions 1000000
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app.core.db import create_db_engine
+from app.core.security import hash_text
+from app.crud.change_log import ChangeLogRepo
+from app.crud.daily_total import DailyTotalRepo
+from app.crud.transaction import TransactionRepo
+from app.migrate import upgrade
+from app.models.budget import Budget
+from app.models.ledger import Ledger
+from app.models.user import Users
+from benchmarks.common import BENCH_PASSWORD
+
+BATCH_SIZE = 50_000
+
+# 分类 -> (权重, 金额中位数)
+EXPENSE_CATEGORIES = {
+    "餐饮": (30, 35), "交通": (15, 12), "购物": (14, 120), "日用": (10, 40), "娱乐": (8, 80),
+    "通讯": (4, 60), "住房": (3, 2500), "医疗": (3, 200), "教育": (2, 500), "旅行": (2, 1500),
+    "人情": (3, 300), "其他": (6, 50),
+}
+INCOME_CATEGORIES = {"奖金": (2, 3000), "理财": (5, 150), "兼职": (3, 800), "其他": (2, 200)}
+# 一天中各小时的权重：早餐、午餐、晚餐时段最多
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 10, 6, 5, 9, 14, 9, 5, 5, 6, 8, 14, 12, 9, 6, 4, 2]
+
+
+def user_counts(users: int, transactions: int, skew: float) -> list[int]:
+    """按幂律权重把交易数分配给各用户"""
+    weights = [1 / (i + 1) ** skew for i in range(users)]
+    total = sum(weights)
+    counts = [int(transactions * w / total) for w in weights]
+    counts[0] += transactions - sum(counts)
+    return counts
+
+
+def generate_transactions(rng: random.Random, user_id: int, count: int, end: datetime, days: int):
+    """逐条生成某个用户的交易，返回适用于 TransactionRepo.bulk_insert 的字典"""
+    expense_names = list(EXPENSE_CATEGORIES)
+    expense_weights = [EXPENSE_CATEGORIES[name][0] for name in expense_names]
+    income_names = list(INCOME_CATEGORIES)
+    income_weights = [INCOME_CATEGORIES[name][0] for name in income_names]
+    hours = list(range(24))
+
+    # 每月 10 日发工资，金额因人而异
+    salary = round(rng.lognormvariate(math.log(9000), 0.4), 2)
+    month = datetime(end.year, end.month, 10, 9)
+    for _ in range(max(1, days // 30)):
+        if month <= end:
+            yield {"user_id": user_id, "type": "income", "amount": salary, "category": "工资",
+                   "description": "工资", "date": month, "created_at": month}
+        month = (month.replace(day=1) - timedelta(days=1)).replace(day=10)
+
+    for _ in range(count):
+        # 三角分布：越近的日期越密集
+        day = end - timedelta(days=int(rng.triangular(0, days, 0)))
+        moment = day.replace(hour=rng.choices(hours, HOUR_WEIGHTS)[0], minute=rng.randrange(60), second=rng.randrange(60))
+        if rng.random() < 0.06:
+            category = rng.choices(income_names, income_weights)[0]
+            type, median = "income", INCOME_CATEGORIES[category][1]
+        else:
+            category = rng.choices(expense_names, expense_weights)[0]
+            type, median = "expense", EXPENSE_CATEGORIES[category][1]
+        amount = max(0.01, round(rng.lognormvariate(math.log(median), 0.6), 2))
+        yield {"user_id": user_id, "type": type, "amount": amount, "category": category,
+               "description": None, "date": moment, "created_at": moment}
+
+
+def seed(path: str, users: int, transactions: int, ledgers: int, budget_months: int,
+         days: int, skew: float, seed_value: int) -> dict:
+    if os.path.exists(path):
+        raise SystemExit(f"{path} already exists")
+    engine = create_db_engine(path)
+    upgrade(engine)
+    rng = random.Random(seed_value)
+    end = datetime.now().replace(microsecond=0)
+    started = time.perf_counter()
+
+    with Session(engine) as session:
+        password = hash_text(BENCH_PASSWORD)
+        accounts = [Users(username=f"bench{i}", password=password) for i in range(users)]
+        session.add_all(accounts)
+        session.commit()
+        user_ids = [account.id for account in accounts]
+
+        for user_id in user_ids:
+            session.add_all(Ledger(user_id=user_id, name=f"账本{i + 1}") for i in range(ledgers))
+            month = end.replace(day=1)
+            for _ in range(budget_months):
+                key = month.strftime("%Y-%m")
+                session.add(Budget(user_id=user_id, month=key, amount=round(rng.uniform(3000, 8000), -2)))
+                session.add(Budget(user_id=user_id, month=key, category="餐饮", amount=round(rng.uniform(800, 2000), -2)))
+                month = (month - timedelta(days=1)).replace(day=1)
+        session.commit()
+
+        repo = TransactionRepo(session)
+        inserted = 0
+        batch = []
+        for user_id, count in zip(user_ids, user_counts(users, transactions, skew)):
+            for row in generate_transactions(rng, user_id, count, end, days):
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    repo.bulk_insert(batch)
+                    session.commit()
+                    inserted += len(batch)
+                    batch.clear()
+        repo.bulk_insert(batch)
+        session.commit()
+        inserted += len(batch)
+
+        # 批量插入绕过了汇总表和变更记录，最后统一重建
+        daily_totals = DailyTotalRepo(session).rebuild()
+        changes = ChangeLogRepo(session).backfill()
+
+    return {
+        "db": path,
+        "users": users,
+        "transactions": inserted,
+        "ledgers": users * ledgers,
+        "budgets": users * budget_months * 2,
+        "daily_totals": daily_totals,
+        "change_log": changes,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench.db", help="path of the database to create")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=1_000_000, help="transactions besides monthly salaries")
+    parser.add_argument("--ledgers", type=int, default=3, help="ledgers per user")
+    parser.add_argument("--budget-months", type=int, default=12, help="months of budgets per user")
+    parser.add_argument("--days", type=int, default=730, help="date range ending today")
+    parser.add_argument("--skew", type=float, default=0.8, help="power-law exponent of per-user activity")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(json.dumps(seed(args.db, args.users, args.transactions, args.ledgers, args.budget_months,
+                          args.days, args.skew, args.seed), ensure_ascii=False, indent=2))
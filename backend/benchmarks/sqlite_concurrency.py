@@ -0,0 +1,116 @@
+"""
+SQLite 并发读写基准：对比默认配置与 core/db.py 中的调优配置（WAL 等 PRAGMA）。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 4 --duration 10
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel
+
+from app.core.db import create_db_engine, SQLITE_PRAGMAS
+from app.crud.transaction import TransactionRepo
+from app.models.transaction import Transaction
+from app.models import user, ledger, budget, profile, daily_total  # noqa: F401
+
+PROFILES = {
+    # 与引入调优前的 core/db.py 等价：rollback journal，无额外 PRAGMA
+    "default": {},
+    "tuned": SQLITE_PRAGMAS,
+}
+
+
+def seed(engine, rows: int):
+    start = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        TransactionRepo(session).bulk_insert([
+            {
+                "user_id": 1,
+                "type": "income" if i % 5 == 0 else "expense",
+                "amount": float(i % 200 + 1),
+                "category": f"c{i % 12}",
+                "date": start + timedelta(minutes=37 * i),
+                "created_at": start,
+            }
+            for i in range(rows)
+        ])
+        session.commit()
+
+
+def run_profile(name: str, readers: int, writers: int, duration: float, rows: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_db_engine(path, pragmas=PROFILES[name], pool_size=readers + writers, max_overflow=0)
+    SQLModel.metadata.create_all(engine)
+    seed(engine, rows)
+
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def record(key: str):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with Session(engine) as session:
+                    TransactionRepo(session).get_user_transactions(user_id=1, limit=50)
+                    TransactionRepo(session).count_user_transactions(user_id=1)
+                record("reads")
+            except OperationalError:
+                record("errors")
+
+    def writer():
+        while not stop.is_set():
+            try:
+                with Session(engine) as session:
+                    TransactionRepo(session).create_transaction(Transaction(
+                        user_id=1, type="expense", amount=1.0, category="bench"
+                    ))
+                record("writes")
+            except OperationalError:
+                record("errors")
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        "profile": name,
+        "reads_per_sec": round(counts["reads"] / duration, 1),
+        "writes_per_sec": round(counts["writes"] / duration, 1),
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per profile")
+    parser.add_argument("--rows", type=int, default=20_000, help="transactions seeded before the run")
+    args = parser.parse_args()
+
+    results = [
+        run_profile(name, args.readers, args.writers, args.duration, args.rows)
+        for name in PROFILES
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+冷启动耗时：导入 app、执行启动事件（数据库升级检查）、处理第一个请求各用多久。
+
+每次运行都在新的子进程中进行，分别测量两种情况：
+    fresh  空数据库，启动时需要建表
+    warm   已是最新结构的数据库，对应容器扩容或重启
+
+total_ms 为子进程从启动到第一个读请求完成的时间，包含解释器启动。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.startup --runs 5 --output startup.json
+    python -m benchmarks.startup --runs 5 --baseline startup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+METRICS = ("import_ms", "startup_ms", "first_request_ms", "first_read_ms", "total_ms")
+
+
+async def measure() -> dict:
+    """在当前进程中测量；必须在导入 app 之前调用"""
+    start = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+
+    # 测试客户端不属于应用，导入时间不计入
+    import httpx
+
+    lifespan = app.router.lifespan_context(app)
+    before = time.perf_counter()
+    await lifespan.__aenter__()
+    result = {"import_ms": (imported - start) * 1000, "startup_ms": (time.perf_counter() - before) * 1000}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            username = f"startup-{uuid.uuid4().hex[:8]}"
+            before = time.perf_counter()
+            response = await client.post("/api/register", json={"username": username, "password": "pw", "repeat_password": "pw"})
+            response.raise_for_status()
+            result["first_request_ms"] = (time.perf_counter() - before) * 1000
+
+            login = await client.post("/api/login", data={"username": username, "password": "pw"})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            before = time.perf_counter()
+            response = await client.get("/api/transactions", headers=headers)
+            response.raise_for_status()
+            result["first_read_ms"] = (time.perf_counter() - before) * 1000
+    finally:
+        await lifespan.__aexit__(None, None, None)
+    return result
+
+
+def run_child(db: str) -> dict:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        env=dict(os.environ, DB_PATH=db, UPLOAD_GC_INTERVAL="0"),
+        check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["total_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def summarize(runs: list[dict]) -> dict:
+    return {
+        metric: {
+            "median": round(statistics.median(run[metric] for run in runs), 1),
+            "min": round(min(run[metric] for run in runs), 1),
+        }
+        for metric in METRICS
+    }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """各场景各指标中位数相对基线的变化百分比，正数表示变慢"""
+    result = {}
+    for case, metrics in report["cases"].items():
+        old = baseline.get("cases", {}).get(case)
+        if old is None:
+            continue
+        result[case] = {
+            f"{metric}_change_pct": round((metrics[metric]["median"] - old[metric]["median"]) / old[metric]["median"] * 100, 1)
+            for metric in METRICS
+            if old.get(metric, {}).get("median")
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare with")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure())))
+        return
+
+    workdir = tempfile.mkdtemp()
+    try:
+        fresh, warm = [], []
+        for i in range(args.runs):
+            fresh.append(run_child(os.path.join(workdir, f"fresh-{i}.db")))
+        # 第一次启动建表并写入 user_version，之后的启动都是 warm
+        warm_db = os.path.join(workdir, "warm.db")
+        run_child(warm_db)
+        for _ in range(args.runs):
+            warm.append(run_child(warm_db))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"runs": args.runs, "cases": {"fresh": summarize(fresh), "warm": summarize(warm)}}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["baseline"] = compare(report, json.load(f))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 数据库路径和上传目录在导入 app 时确定，必须先切换到临时目录
+WORKDIR = tempfile.mkdtemp(prefix="ledger-tests-")
+os.environ["DB_PATH"] = os.path.join(WORKDIR, "app.db")
+os.chdir(WORKDIR)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app.main import app
+    from app.migrate import upgrade
+
+    upgrade()
+    yield app
+    # 等待后台缩略图任务结束，pytest 结束时会切回原来的工作目录
+    from app.core.thumbnails import _executor
+    _executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def auth_headers(app):
+    """注册一个新用户并返回带 token 的请求头"""
+    import uuid
+
+    from fastapi.testclient import TestClient
+
+    username = f"user-{uuid.uuid4().hex[:8]}"
+    with TestClient(app) as client:
+        client.post("/api/register", json={"username": username, "password": "pw", "repeat_password": "pw"})
+        token = client.post("/api/login", data={"username": username, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
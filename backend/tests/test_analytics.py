@@ -0,0 +1,18 @@
+def test_analytics_converts_aware_start_date_to_utc(app, auth_headers):
+    """带偏移量的 start_date 按 UTC 换算后筛选，再按 tz 的本地日期分桶"""
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        for amount, date in ((10, "2025-12-01T15:00:00"), (5, "2025-12-01T17:00:00")):
+            response = client.post("/api/transactions", headers=auth_headers,
+                                   json={"type": "expense", "amount": amount, "category": "food", "date": date})
+            assert response.status_code == 201
+        # 2025-12-02T00:30+08:00 即 2025-12-01T16:30 UTC，只包含 17:00 的记录
+        response = client.get("/api/transactions/analytics", headers=auth_headers,
+                              params={"start_date": "2025-12-02T00:30:00+08:00", "tz": "Asia/Shanghai"})
+
+    assert response.status_code == 200
+    analytics = response.json()
+    assert analytics["days"] == ["2025-12-02"]
+    assert analytics["expense"] == [5.0]
+    assert analytics["total_expense"] == 5.0
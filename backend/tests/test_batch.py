@@ -0,0 +1,59 @@
+from sqlalchemy import event
+
+
+def daily_totals(engine, user_id: int) -> list[tuple]:
+    with engine.connect() as connection:
+        return connection.exec_driver_sql(
+            "SELECT day, type, category, round(amount, 2), count FROM daily_totals WHERE user_id = ? ORDER BY 1, 2, 3",
+            (user_id,)
+        ).all()
+
+
+def test_batch_writes_daily_totals_once(app, auth_headers):
+    """批量操作的汇总增量合并后写入，结果与按原始记录重建一致"""
+    from fastapi.testclient import TestClient
+    from sqlmodel import Session
+
+    from app.core.db import engine
+    from app.crud.daily_total import DailyTotalRepo
+
+    with TestClient(app) as client:
+        kept = client.post("/api/transactions", headers=auth_headers, json={
+            "type": "expense", "amount": 10, "category": "food", "date": "2025-01-01T10:00:00"
+        }).json()["id"]
+        gone = client.post("/api/transactions", headers=auth_headers, json={
+            "type": "expense", "amount": 7, "category": "taxi", "date": "2025-01-02T10:00:00"
+        }).json()["id"]
+        operations = [
+            {"op": "create", "data": {"type": "expense", "amount": i + 1, "category": "food", "date": "2025-01-01T12:00:00"}}
+            for i in range(30)
+        ] + [
+            {"op": "update", "id": kept, "data": {"amount": 20, "category": "rent"}},
+            {"op": "delete", "id": gone},
+        ]
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if "daily_totals" in statement:
+                statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.post("/api/transactions/batch", headers=auth_headers, json={"operations": operations})
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        user_id = client.get(f"/api/transactions/{kept}", headers=auth_headers).json()["user_id"]
+
+    assert response.status_code == 200
+    # 一次 upsert 加一次删除计数归零的行
+    assert len(statements) == 2
+
+    totals = daily_totals(engine, user_id)
+    assert ("2025-01-01", "expense", "food", 465.0, 30) in totals
+    assert ("2025-01-01", "expense", "rent", 20.0, 1) in totals
+    assert not [row for row in totals if row[2] == "taxi"]
+
+    with Session(engine) as session:
+        DailyTotalRepo(session).rebuild(user_id)
+    assert daily_totals(engine, user_id) == totals
@@ -0,0 +1,28 @@
+import anyio.to_thread
+
+from app.core.db import DB_ASYNC
+
+
+def test_read_request_dispatches_only_queries_to_threadpool(app, auth_headers, monkeypatch):
+    """读接口的依赖项都是协程：同步会话下只有数据版本和服务调用各进入线程池一次，异步会话下一次都没有"""
+    from fastapi.testclient import TestClient
+
+    calls = []
+    run_sync = anyio.to_thread.run_sync
+
+    async def counting(func, *args, **kwargs):
+        calls.append(func)
+        return await run_sync(func, *args, **kwargs)
+
+    with TestClient(app) as client:
+        monkeypatch.setattr(anyio.to_thread, "run_sync", counting)
+        response = client.get("/api/transactions", headers=auth_headers)
+        etag = response.headers["etag"]
+        dispatches = len(calls)
+        calls.clear()
+        not_modified = client.get("/api/transactions", headers={**auth_headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert not_modified.status_code == 304
+    assert dispatches == (0 if DB_ASYNC else 2)
+    assert len(calls) == (0 if DB_ASYNC else 1)
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+from sqlalchemy import inspect, text
+
+from app.migrate import get_user_version, schema_version, upgrade
+from app.models.budget import Budget
+from app.models.transaction import Transaction
+
+
+def get_index(table, name: str):
+    return next(index for index in table.indexes if index.name == name)
+
+
+def test_schema_version_covers_partial_index_condition():
+    index = get_index(Transaction.__table__, "ix_transaction_image_path")
+    before = schema_version()
+    where = index.dialect_options["sqlite"]["where"]
+    index.dialect_options["sqlite"]["where"] = text("image_path IS NOT NULL AND image_path != ''")
+    try:
+        assert schema_version() != before
+    finally:
+        index.dialect_options["sqlite"]["where"] = where
+    assert schema_version() == before
+
+
+def test_schema_version_covers_index_expressions():
+    index = get_index(Budget.__table__, "uq_budgets_user_month_coalesce_category")
+    before = schema_version()
+    expressions = index.expressions
+    index.expressions = [*expressions[:-1], text("coalesce(category, '-')")]
+    try:
+        assert schema_version() != before
+    finally:
+        index.expressions = expressions
+    assert schema_version() == before
+
+
+def test_upgrade_database_created_by_init_db(tmp_path):
+    """init_db.py 建的表缺少后来加入的可空列，升级时补上后再建索引"""
+    from sqlmodel import Session
+
+    from app.core.db import create_db_engine
+    from app.models.user import Users
+
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "init_db.py")
+    subprocess.run([sys.executable, script], cwd=tmp_path, check=True)
+    bind = create_db_engine(str(tmp_path / "app.db"), pragmas={})
+
+    created = upgrade(bind, force=True)
+
+    assert "ix_transaction_image_path" in created
+    assert "image_path" in {column["name"] for column in inspect(bind).get_columns("transaction")}
+    assert get_user_version(bind) == schema_version(bind)
+    with Session(bind) as session:
+        session.add(Transaction(user_id=1, type="expense", amount=1, category="food", image_path="/uploads/a.png"))
+        session.commit()
+        assert session.get(Users, 1).avatar_path is None
+    assert upgrade(bind) == []
+    bind.dispose()
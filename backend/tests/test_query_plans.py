@@ -0,0 +1,122 @@
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.core.db import create_db_engine
+from app.crud.budget import BudgetRepo
+from app.crud.ledger import LIST_COLUMNS as LEDGER_COLUMNS, LedgerRepo
+from app.crud.transaction import LIST_COLUMNS, TransactionRepo
+from app.crud.upload import UploadRefRepo
+from app.migrate import upgrade
+from app.models.budget import Budget
+
+# 不经过索引的全表扫描，如 "SCAN transactions"
+FULL_SCAN = re.compile(r"^SCAN \w+$")
+
+
+@pytest.fixture
+def bind(tmp_path):
+    bind = create_db_engine(str(tmp_path / "plans.db"), pragmas={})
+    upgrade(bind)
+    yield bind
+    bind.dispose()
+
+
+def query_plans(bind, run) -> list[str]:
+    """执行 run(session)，返回其中每条 SELECT 的 EXPLAIN QUERY PLAN 各行"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        with Session(bind) as session:
+            run(session)
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+
+    assert statements
+    details = []
+    with bind.connect() as connection:
+        for statement, parameters in statements:
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            details += [row[-1] for row in rows]
+    return details
+
+
+def assert_uses(details: list[str], index: str):
+    assert not [detail for detail in details if FULL_SCAN.match(detail)], details
+    assert any(index in detail for detail in details), details
+
+
+@pytest.mark.parametrize("filters, index", [
+    ({}, "ix_transaction_user_date"),
+    ({"type": "expense"}, "ix_transaction_user_type_date"),
+    ({"category": "food"}, "ix_transaction_user_category_date"),
+])
+def test_transaction_list_uses_index(bind, filters, index):
+    def run(session):
+        repo = TransactionRepo(session)
+        repo.get_user_transactions(1, limit=101, columns=LIST_COLUMNS, **filters)
+        repo.get_user_transactions(1, limit=101, columns=LIST_COLUMNS, before=(datetime(2025, 1, 1), 10), **filters)
+        repo.count_user_transactions(1, **filters)
+
+    assert_uses(query_plans(bind, run), index)
+
+
+@pytest.mark.parametrize("by_category, by_month", [(False, False), (True, True)])
+def test_summary_uses_daily_totals_key_and_transaction_index(bind, by_category, by_month):
+    def run(session):
+        # 首尾不足一天的部分查询原始记录，整天部分查询 daily_totals
+        TransactionRepo(session).get_user_summary(
+            1, datetime(2025, 1, 1, 12), datetime(2025, 3, 1, 12), by_category=by_category, by_month=by_month
+        )
+
+    details = query_plans(bind, run)
+    assert_uses(details, "sqlite_autoindex_daily_totals_1")
+    # 分组方式不同时规划器会选择不同的 (user_id, ...) 复合索引
+    assert_uses(details, "INDEX ix_transaction_user_")
+
+
+def test_ledger_list_uses_index(bind):
+    def run(session):
+        repo = LedgerRepo(session)
+        repo.get_user_ledgers(1, columns=LEDGER_COLUMNS)
+        repo.count_user_ledgers(1)
+
+    assert_uses(query_plans(bind, run), "ix_ledger_user_created_at")
+
+
+def test_budget_queries_use_index(bind):
+    def run(session):
+        repo = BudgetRepo(session)
+        repo.get_budgets_by_month(1, "2025-01")
+        repo.get_budget(1, "2025-01", "food")
+        repo.get_budget(1, "2025-01", None)
+
+    assert_uses(query_plans(bind, run), "uq_budgets_user_month_coalesce_category")
+
+
+def test_budget_total_is_unique_per_month(bind):
+    with Session(bind) as session:
+        session.add(Budget(user_id=1, amount=100, month="2025-01"))
+        session.add(Budget(user_id=1, amount=10, month="2025-01", category="food"))
+        session.commit()
+        session.add(Budget(user_id=1, amount=200, month="2025-01"))
+        with pytest.raises(IntegrityError):
+            session.commit()
+
+
+def test_upload_refs_use_indexes(bind):
+    def run(session):
+        UploadRefRepo(session).referenced(["/uploads/a.png", "/uploads/b.png"])
+
+    details = query_plans(bind, run)
+    for index in ("ix_transaction_image_path", "ix_userprofile_avatar_url", "ix_users_avatar_path"):
+        assert_uses(details, index)
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import uuid
+
+from sqlmodel import Session, SQLModel
+
+
+def login(client) -> dict:
+    username = f"user-{uuid.uuid4().hex[:8]}"
+    client.post("/api/register", json={"username": username, "password": "pw", "repeat_password": "pw"})
+    token = client.post("/api/login", data={"username": username, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def create_transaction(client, headers) -> dict:
+    response = client.post("/api/transactions", headers=headers,
+                           json={"type": "expense", "amount": 1, "category": "food"})
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_deleted_id_is_not_reused(app, auth_headers):
+    """删除最大 id 的记录后，其他用户新建的记录不会拿到同一个 id，墓碑仍能同步给原用户"""
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        other = login(client)
+        deleted = create_transaction(client, auth_headers)["id"]
+        token = client.get("/api/sync", headers=auth_headers).json()["next_token"]
+        assert client.delete(f"/api/transactions/{deleted}", headers=auth_headers).status_code == 204
+        created = create_transaction(client, other)["id"]
+        changes = client.get("/api/sync", headers=auth_headers, params={"since": token}).json()
+
+    assert created > deleted
+    assert changes["deleted"]["transactions"] == [deleted]
+
+
+def test_reused_id_keeps_other_users_tombstone(app, auth_headers):
+    """即使 id 被复用（AUTOINCREMENT 之前的旧数据库），新记录的变更也不会覆盖其他用户的墓碑"""
+    from fastapi.testclient import TestClient
+
+    from app.core.db import engine
+    from app.models.transaction import Transaction
+
+    with TestClient(app) as client:
+        other = login(client)
+        deleted = create_transaction(client, auth_headers)["id"]
+        token = client.get("/api/sync", headers=auth_headers).json()["next_token"]
+        assert client.delete(f"/api/transactions/{deleted}", headers=auth_headers).status_code == 204
+        other_id = create_transaction(client, other)["user_id"]
+        with Session(engine) as session:
+            session.add(Transaction(id=deleted, user_id=other_id, type="expense", amount=2, category="food"))
+            session.commit()
+        changes = client.get("/api/sync", headers=auth_headers, params={"since": token}).json()
+        other_changes = client.get("/api/sync", headers=other).json()
+
+    assert changes["deleted"]["transactions"] == [deleted]
+    assert deleted in [item["id"] for item in other_changes["transactions"]]
+
+
+def test_upgrade_adds_autoincrement_to_old_tables(tmp_path):
+    """旧表重建为 AUTOINCREMENT 后数据保留，新 id 排在已有记录和墓碑之后"""
+    from app.core.db import create_db_engine
+    from app.migrate import has_autoincrement, upgrade
+    from app.models.change_log import ChangeLog
+
+    path = str(tmp_path / "old.db")
+    bind = create_db_engine(path, pragmas={})
+    SQLModel.metadata.create_all(bind, tables=[ChangeLog.__table__])
+    with sqlite3.connect(path) as connection:
+        connection.executescript("""
+            CREATE TABLE "transaction" (
+                id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, type VARCHAR NOT NULL, amount FLOAT NOT NULL,
+                category VARCHAR NOT NULL, description VARCHAR, image_path VARCHAR, date DATETIME NOT NULL,
+                created_at DATETIME NOT NULL, updated_at DATETIME
+            );
+            INSERT INTO "transaction" (id, user_id, type, amount, category, date, created_at)
+                VALUES (1, 1, 'expense', 3, 'food', '2025-01-01 00:00:00', '2025-01-01 00:00:00');
+            INSERT INTO change_log (user_id, entity, entity_id, deleted, changed_at)
+                VALUES (1, 'transaction', 5, 1, '2025-01-01 00:00:00');
+        """)
+    assert not has_autoincrement(bind, "transaction")
+
+    upgrade(bind)
+
+    assert has_autoincrement(bind, "transaction")
+    with sqlite3.connect(path) as connection:
+        assert connection.execute('SELECT id, amount FROM "transaction"').fetchall() == [(1, 3.0)]
+        connection.execute("""
+            INSERT INTO "transaction" (user_id, type, amount, category, date, created_at)
+                VALUES (2, 'income', 1, 'pay', '2025-01-02 00:00:00', '2025-01-02 00:00:00')
+        """)
+        assert connection.execute('SELECT max(id) FROM "transaction"').fetchone() == (6,)
+        indexes = {row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'transaction'"
+        )}
+    assert "ix_transaction_user_date" in indexes
+    bind.dispose()
+    os.remove(path)
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import struct
+import zlib
+
+import httpx
+
+from app.core.storage import UPLOAD_DIR, UPLOAD_MAX_BYTES
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n" + b"\x00" * 8
+BOUNDARY = "test-boundary"
+CHUNK_SIZE = 64 * 1024
+
+
+def png(color: bytes = b"\xff\x00\x00") -> bytes:
+    """1x1 的合法 PNG"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(b"\x00" + color)) + chunk(b"IEND", b"")
+
+
+def temp_files() -> list[str]:
+    return [name for name in os.listdir(UPLOAD_DIR) if name.startswith(".upload-")]
+
+
+def test_chunked_upload_over_limit_is_aborted_early(app, auth_headers):
+    """没有 Content-Length 的分块上传超过上限时返回 413，且不会读完整个请求体"""
+    total_chunks = UPLOAD_MAX_BYTES // CHUNK_SIZE * 2
+    sent = 0
+
+    async def body():
+        nonlocal sent
+        yield (
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="big.png"\r\n'
+            "Content-Type: image/png\r\n\r\n"
+        ).encode() + PNG_HEADER
+        for _ in range(total_chunks):
+            sent += 1
+            yield b"\x00" * CHUNK_SIZE
+        yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+    async def upload():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/upload/image",
+                content=body(),
+                headers={**auth_headers, "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+            )
+
+    response = asyncio.run(upload())
+    assert response.status_code == 413
+    assert sent < total_chunks
+    assert sent * CHUNK_SIZE <= UPLOAD_MAX_BYTES + 2 * CHUNK_SIZE
+    assert temp_files() == []
+
+
+def test_upload_stores_content_addressed_file(app, auth_headers):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        first = client.post("/api/upload/image", files={"file": ("a.png", png(), "image/png")},
+                            headers=auth_headers)
+        second = client.post("/api/upload/image", files={"file": ("b.png", png(), "image/png")},
+                             headers=auth_headers)
+        rejected = client.post("/api/upload/image", files={"file": ("a.txt", b"not an image at all", "text/plain")},
+                               headers=auth_headers)
+
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    assert os.path.exists(os.path.join(UPLOAD_DIR, first.json()["url"].removeprefix("/uploads/")))
+    assert rejected.status_code == 400
+    assert temp_files() == []
+
+
+def test_thumbnail_fallback_is_not_cached_as_immutable(app, auth_headers):
+    """无法生成缩略图时回退的原图不能被长期缓存，缩略图和原图本身仍为 immutable"""
+    from fastapi.testclient import TestClient
+
+    broken = PNG_HEADER + b"\x00" * 64
+    with TestClient(app) as client:
+        url = client.post("/api/upload/image", files={"file": ("c.png", broken, "image/png")},
+                          headers=auth_headers).json()["url"]
+        fallback = client.get(url, params={"w": 64})
+        original = client.get(url)
+        thumb_url = client.post("/api/upload/image", files={"file": ("d.png", png(b"\x00\xff\x00"), "image/png")},
+                                headers=auth_headers).json()["url"]
+        thumbnail = client.get(thumb_url, params={"w": 64})
+
+    assert fallback.status_code == 200
+    assert fallback.content == broken
+    assert "immutable" not in fallback.headers["cache-control"]
+    assert "no-cache" in fallback.headers["cache-control"]
+    assert "immutable" in original.headers["cache-control"]
+    assert thumbnail.status_code == 200
+    assert thumbnail.headers["etag"].endswith('-w64.png"')
+    assert "immutable" in thumbnail.headers["cache-control"]
+
+
+def test_garbage_collector_keeps_file_reused_during_scan(app, monkeypatch):
+    """扫描时已过宽限期、查询引用期间被新上传复用（刷新修改时间）的文件不会被删除"""
+    from app.crud.upload import UploadRefRepo
+    from app.services.upload import collect_garbage
+
+    path = os.path.join(UPLOAD_DIR, "reused.png")
+    with open(path, "wb") as f:
+        f.write(png(b"\x00\xff\x00"))
+    os.utime(path, (0, 0))
+
+    def referenced(self, urls):
+        os.utime(path)
+        return set()
+
+    monkeypatch.setattr(UploadRefRepo, "referenced", referenced)
+    try:
+        stats = collect_garbage(grace=60)
+        assert os.path.exists(path)
+        assert stats["orphaned"] == 0
+    finally:
+        os.remove(path)